@@ -1,17 +1,33 @@
 from contextlib import asynccontextmanager
-import cv2
-import numpy as np
 import uvicorn
 from fastapi import WebSocket, Request
-import speech_recognition as sr
 import asyncio
-from features.translate import translate_text
+import json
+import time
+from features.translate import translate_text, get_translator
+from features.translation_cache import translation_cache
 from features.translate_image import translate_text_from_image_array
-from features.sign_language import sign_language_from_image_array
+from features.sign_classifier import recognize_sign, get_local_classifier
+from features.rgb565 import decode_rgb565
+from features.inference_pool import InferencePool, PoolSaturated
+from features.groq_client import close_client, get_client
+from features.frame_cache import FrameCache, dhash
+from features.image_encoding import Frame, is_jpeg, jpeg_decodes
+from features.frame_archive import FrameArchiver
+from features.audio_pipeline import AudioPipeline, make_audio_source
+from features.broadcaster import Broadcaster
+from features.frame_protocol import FrameHeader, iter_frames
+from features.frame_scheduler import FrameScheduler, FrameDropped
+from features.device_sessions import DeviceSession, FairScheduler, SessionManager, TooManyDevices, UnknownDevice
+from features.speech_backends import check_speech_backend, get_speech_backend
+from features.metrics import (FRAME_RESULTS, MetricsMiddleware, metrics_response, observe_payload,
+                              observe_stage, span, track_queue, track_stats)
+from config import (INFERENCE_RETRY_AFTER, BROADCAST_SEND_TIMEOUT, STARTUP_WARMUP,
+                    FRAMES_WS_MAX_IN_FLIGHT)
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
+from typing import Optional
 from fastapi.responses import JSONResponse
-from datetime import datetime
 
 
 
@@ -19,117 +35,268 @@ from datetime import datetime
 class ImageData(BaseModel):
     image_base64: str
 
+class DeviceSettings(BaseModel):
+    target_lang: Optional[str] = None
+    weight: Optional[float] = None
+
 
 app = FastAPI()
-recognizer = sr.Recognizer()
-mic = sr.Microphone()
 recording = False
 audio_data = None
-# Shared queue for storing transcriptions
-transcription_queue = asyncio.Queue()
+# Every /audio-stream client gets its own copy of each transcription
+transcriptions = Broadcaster()
+# Blocking vision calls run here so they never stall the event loop
+inference_pool = InferencePool()
+# Near-identical frames reuse the previous answer instead of calling upstream
+frame_cache = FrameCache()
+# Samples of incoming frames are written to disk by a background thread
+frame_archiver = FrameArchiver()
+# Per device and mode only the newest frame waits for a worker; older waiting frames are dropped
+frame_scheduler = FrameScheduler()
+# One session per pair of glasses; worker slots are shared between them by weighted round-robin
+device_sessions = SessionManager()
+fair_scheduler = FairScheduler()
+
+track_queue("inference", lambda: inference_pool.stats()["queued"])
+track_queue("fair_waiting", lambda: sum(fair_scheduler.stats()["waiting"].values()))
+track_queue("frames_waiting", lambda: frame_scheduler.stats()["waiting"])
+track_queue("archive", lambda: frame_archiver.stats()["queued"])
+track_queue("broadcast", lambda: sum(sub["pending"] for sub in transcriptions.stats()["subscribers"].values()))
+track_stats("frame_cache", frame_cache.stats, counters=("hits", "misses"), gauges=("entries", "hit_ratio"))
+track_stats("translation_cache", translation_cache.stats, counters=("hits", "disk_hits", "misses"),
+            gauges=("entries", "memory_bytes", "hit_ratio"))
+track_stats("archive", frame_archiver.stats, counters=("written", "dropped", "errors"), gauges=("files", "bytes"))
+track_stats("broadcast", transcriptions.stats, counters=("published",))
+# One series per connected /audio-stream client, gone once it disconnects
+track_stats("broadcast_client", lambda: transcriptions.stats()["subscribers"], counters=("sent", "dropped"),
+            gauges=("pending", "lag_ms", "max_lag_ms"), label="client")
+
+
+def warm_up():
+    """Load models and open clients ahead of the first frame; a failure only makes that frame slower"""
+    steps = [
+        ("translation cache", translation_cache.open),
+        ("groq client", lambda: get_client().warm_up()),
+        ("translator", get_translator),
+        ("sign classifier", get_local_classifier),
+    ]
+    for name, step in steps:
+        start = time.perf_counter()
+        try:
+            step()
+            print(f"[Warmup] {name} ready in {(time.perf_counter() - start) * 1000:.0f} ms")
+        except Exception as e:
+            print(f"[Warmup] {name} failed: {str(e)}")
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    # Nothing above touches devices, credentials or models; they are set up from here on
+    # A typo in SPEECH_BACKEND should stop startup, not silently disable subtitles
+    check_speech_backend()
+    frame_archiver.start()
     print("Starting audio listener...")
     audio_task = asyncio.create_task(audio_listener())
+    if STARTUP_WARMUP:
+        # Runs in the background so the server accepts requests right away
+        asyncio.get_running_loop().run_in_executor(None, warm_up)
     yield  # App runs while this context is active
     print("Shutting down...")
     audio_task.cancel()
+    inference_pool.shutdown()
+    frame_archiver.stop()
+    await close_client()
 
 app.router.lifespan_context = lifespan
+app.add_middleware(MetricsMiddleware)
 
 
-# Background task: keeps capturing audio, recognizing, translating and adding to queue
+# Background task: captures continuously while recognition and translation run
+# as separate pipeline stages, adding results to the queue
 async def audio_listener():
     while True:
+        try:
+            # Load the recognition model before capture starts so the first utterance isn't slow
+            await asyncio.to_thread(get_speech_backend)
+        except Exception as e:
+            print(f"Speech backend unavailable: {str(e)}")
         print("Capturing audio...")
-        audio = await asyncio.to_thread(capture_audio)
-        text = await asyncio.to_thread(recognize_audio, audio)
-        if text:  # Only process if text isn't None
-            translated_text = await translate_text(text)
-            await transcription_queue.put(translated_text)
-            print(f"Queued: {translated_text}")
-        else:
-            print("No recognizable audio")
-        await asyncio.sleep(0.1)  # Small delay before next capture
-
-def capture_audio():
-    with mic as source:
-        recognizer.adjust_for_ambient_noise(source)
-        print("Listening for 3 seconds...")
-        return recognizer.listen(source, phrase_time_limit=3)
+        pipeline = AudioPipeline(make_audio_source(), recognize_audio, translate_text, transcriptions.publish)
+        try:
+            await pipeline.run()
+            print("Audio source exhausted")
+            return
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Audio pipeline failed: {str(e)}")
+            await asyncio.sleep(5)  # Give the device a moment before reopening it
 
 def recognize_audio(audio):
+    # Engine failures are logged, not broadcast to the glasses as subtitles
     try:
-        return recognizer.recognize_google(audio)
-    except sr.UnknownValueError:
+        return get_speech_backend().recognize(audio)
+    except Exception as e:
+        print(f"Recognition error: {str(e)}")
         return None
-    except sr.RequestError as e:
-        return f"Recognition error: {e}"
 
 @app.websocket("/audio-stream")
 async def websocket_audio(websocket: WebSocket):
     await websocket.accept()
     await websocket.send_text("Connected to real-time audio stream.")
-    try:
+    subscriber = transcriptions.subscribe(f"{websocket.client.host}:{websocket.client.port}")
+
+    async def send_loop():
         while True:
-            text = await transcription_queue.get()
-            await websocket.send_text(text)
-            print(f"Sent to WebSocket: {text}")
-            await asyncio.sleep(0.5)
+            # Everything that piled up since the last send goes out as one frame
+            texts = await subscriber.next_batch()
+            observe_stage("ws_queue_lag", subscriber.last_lag_ms / 1000)
+            text = "\n".join(texts)
+            with span("ws_send"):
+                await asyncio.wait_for(websocket.send_text(text), timeout=BROADCAST_SEND_TIMEOUT)
+            print(f"Sent to WebSocket {subscriber.name}: {text}")
+
+    async def receive_loop():
+        # Returns as soon as the client goes away, even while nothing is being sent
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+
+    tasks = [asyncio.create_task(send_loop()), asyncio.create_task(receive_loop())]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            if task.exception() is not None:
+                raise task.exception()
+        print(f"WebSocket {subscriber.name} disconnected")
     except Exception as e:
         print(f"WebSocket connection closed: {str(e)}")
-
-@app.post("/upload")
-async def receive_image(request: Request):
+    finally:
+        for task in tasks:
+            task.cancel()
+        transcriptions.unsubscribe(subscriber)
+
+async def process_frame(mode: str, frame: Frame, session: DeviceSession) -> dict:
+    """Answer a frame from the cache, or run it through the inference pool"""
+    dest_lang = session.target_lang if mode == "translate" else None
+    with span("frame_hash"):
+        frame_hash = dhash(frame)
+    cached = frame_cache.get(frame_hash, mode, dest_lang)
+    if cached is not None:
+        print(f"[Cache] {mode} hit: {cached}")
+        FRAME_RESULTS.labels(mode, "cache").inc()
+        return {"message": cached, "source": "cache"}
+
+    async def infer():
+        # Waits for this device's turn when other devices are already using every worker
+        return await fair_scheduler.run(session.device_id, session.weight, run_pipeline)
+
+    async def run_pipeline():
+        if mode == "translate":
+            return {"message": await inference_pool.run(translate_text_from_image_array, frame, dest_lang)}
+        # Local landmark classifier first, remote model only when it is unsure
+        return await inference_pool.run(recognize_sign, frame)
+
+    # Raises FrameDropped when a newer frame from this device makes the answer pointless
+    result = await frame_scheduler.run(session.device_id, mode, infer)
+
+    if result["message"] is not None:
+        frame_cache.put(frame_hash, mode, dest_lang, result["message"])
+    FRAME_RESULTS.labels(mode, result.get("source", "remote")).inc()
+    return result
+
+def load_frame(body: bytes, width: int, height: int, img_format: str) -> Frame:
+    """Validate a frame body and turn it into what the pipelines take; ValueError on bad input"""
+    if img_format == "jpeg":
+        # Already compressed on the device: forward as-is, no decode/re-encode
+        if not is_jpeg(body):
+            raise ValueError("Body is not a JPEG image")
+        # A truncated or corrupt JPEG would otherwise only fail later, in dhash, as a 500
+        if not jpeg_decodes(body):
+            raise ValueError("Could not decode JPEG image")
+        return bytes(body)
+    if width <= 0 or height <= 0 or img_format != "rgb565":
+        raise ValueError("Invalid image metadata")
+    # Convert RGB565 to RGB888
+    with span("rgb565_decode"):
+        return decode_rgb565(body, width, height)
+
+async def answer_frame(mode: str, frame: Frame, session: DeviceSession) -> dict:
+    """Run a decoded frame through its pipeline, then archive it off the request path"""
+    start = time.perf_counter()
+    try:
+        result = await process_frame(mode, frame, session)
+    except FrameDropped:
+        session.record_failure("dropped")
+        raise
+    except PoolSaturated:
+        session.record_failure("busy")
+        raise
+    except Exception:
+        session.record_failure("error")
+        raise
+    session.record_result(mode, result, time.perf_counter() - start)
+    print(result["message"])
+    frame_archiver.submit(frame, mode)
+    return result
+
+def too_many_devices(e: TooManyDevices) -> JSONResponse:
+    print(f"Refusing device: {str(e)}")
+    return JSONResponse(
+        status_code=503,
+        content={"error": "Too many devices connected, retry later"},
+        headers={"Retry-After": str(INFERENCE_RETRY_AFTER)}
+    )
+
+async def handle_frame_request(request: Request, mode: str):
+    """Shared body of /upload and /sign_language"""
+    try:
+        session = device_sessions.identify(request)
+    except UnknownDevice as e:
+        return JSONResponse(status_code=401, content={"error": str(e)})
+    except TooManyDevices as e:
+        return too_many_devices(e)
+    if not session.admit(mode):
+        return JSONResponse(
+            status_code=429,
+            content={"error": "Rate limit exceeded"},
+            headers={"Retry-After": str(max(1, round(session.bucket.retry_after())))}
+        )
     # Read raw body content
     body = await request.body()
+    observe_payload("frame_body", len(body))
     # Get image metadata from headers
     try:
         width = int(request.headers.get("X-Image-Width", "0"))
         height = int(request.headers.get("X-Image-Height", "0"))
         img_format = request.headers.get("X-Image-Format", "").lower()
+        print(f"Received image: {width}x{height} {img_format}, size: {len(body)} bytes")
 
-        if width <= 0 or height <= 0 or img_format != "rgb565":
-            print(f"Invalid image metadata: width={width}, height={height}, format={img_format}")
+        try:
+            frame = load_frame(body, width, height, img_format)
+        except ValueError as e:
+            print(f"Invalid image: {str(e)}")
             return JSONResponse(
                 status_code=400,
-                content={"error": "Invalid image metadata"}
+                content={"error": str(e)}
             )
 
-        print(f"Received image: {width}x{height} {img_format}, size: {len(body)} bytes")
-
-        # Convert RGB565 to OpenCV format (BGR)
-        img = np.frombuffer(body, dtype=np.uint16).reshape((height, width))
-
-        # Convert RGB565 to RGB888
-        r = ((img & 0xF800) >> 11) * 8  # Extract 5 bits red and scale to 8 bits
-        g = ((img & 0x07E0) >> 5) * 4  # Extract 6 bits green and scale to 8 bits
-        b = (img & 0x001F) * 8  # Extract 5 bits blue and scale to 8 bits
-
-        # Create BGR image for OpenCV
-        bgr = np.zeros((height, width, 3), dtype=np.uint8)
-        bgr[:, :, 0] = b
-        bgr[:, :, 1] = g
-        bgr[:, :, 2] = r
-        rgb = cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB)
-        result = translate_text_from_image_array(rgb)
-        print(result)
-        # Process the image (example: apply Gaussian blur)
-        # processed_img = cv2.GaussianBlur(bgr, (5, 5), 0)
-
-        # Save the processed image
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        original_filename = f"original_{timestamp}.jpg"
-        processed_filename = f"processed_{timestamp}.jpg"
-
-        cv2.imwrite(original_filename, rgb)
-        # cv2.imwrite(processed_filename, processed_img)
-
-        return {
-            "message": result,
-        }
+        try:
+            return await answer_frame(mode, frame, session)
+        except FrameDropped as e:
+            print(f"Dropping frame: {str(e)}")
+            return JSONResponse(
+                status_code=409,
+                content={"error": str(e)}
+            )
+        except PoolSaturated as e:
+            print(f"Rejecting frame: {str(e)}")
+            return JSONResponse(
+                status_code=503,
+                content={"error": "Server busy, retry later"},
+                headers={"Retry-After": str(INFERENCE_RETRY_AFTER)}
+            )
     except Exception as e:
         print(f"Error processing image: {str(e)}")
         return JSONResponse(
@@ -137,58 +304,135 @@ async def receive_image(request: Request):
             content={"error": f"Failed to process image: {str(e)}"}
         )
 
-@app.post("/sign_language")
-async def sign_language(request : Request):
-    # Read raw body content
-    body = await request.body()
-    # Get image metadata from headers
+@app.websocket("/frames")
+async def websocket_frames(websocket: WebSocket):
+    """Persistent frame channel: binary frames in (see features/frame_protocol.py), JSON results out.
+
+    Results carry the frame's seq and may arrive out of order.
+    """
     try:
-        width = int(request.headers.get("X-Image-Width", "0"))
-        height = int(request.headers.get("X-Image-Height", "0"))
-        img_format = request.headers.get("X-Image-Format", "").lower()
+        session = device_sessions.identify(websocket)
+    except UnknownDevice:
+        await websocket.close(code=1008)
+        return
+    except TooManyDevices as e:
+        print(f"Refusing frame channel: {str(e)}")
+        # 1013: try again later
+        await websocket.close(code=1013)
+        return
+    await websocket.accept()
+    name = f"{session.device_id} ({websocket.client.host}:{websocket.client.port})"
+    send_lock = asyncio.Lock()
+    in_flight = set()
+
+    async def reply(content: dict):
+        async with send_lock:
+            await websocket.send_text(json.dumps(content))
+
+    async def answer(header: FrameHeader, payload: memoryview):
+        content = {"seq": header.seq, "mode": header.mode}
+        try:
+            frame = load_frame(payload, header.width, header.height, header.img_format)
+            content.update(await answer_frame(header.mode, frame, session))
+        except ValueError as e:
+            content["error"] = str(e)
+        except FrameDropped as e:
+            content.update(error=str(e), dropped=True)
+        except PoolSaturated:
+            content.update(error="Server busy, retry later", retry_after=INFERENCE_RETRY_AFTER)
+        except Exception as e:
+            print(f"Error processing frame {header.seq} from {name}: {str(e)}")
+            content["error"] = f"Failed to process image: {str(e)}"
+        try:
+            await reply(content)
+        except Exception as e:
+            # The client went away while this frame was being processed
+            print(f"Could not deliver frame {header.seq} to {name}: {str(e)}")
 
-        if width <= 0 or height <= 0 or img_format != "rgb565":
-            print(f"Invalid image metadata: width={width}, height={height}, format={img_format}")
-            return JSONResponse(
-                status_code=400,
-                content={"error": "Invalid image metadata"}
-            )
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            data = message.get("bytes")
+            if data is None:
+                await reply({"error": "Frames must be sent as binary messages"})
+                continue
+            observe_payload("frame_body", len(data))
+            try:
+                for header, payload in iter_frames(data):
+                    if not session.admit(header.mode):
+                        await reply({"seq": header.seq, "mode": header.mode, "error": "Rate limit exceeded",
+                                     "retry_after": session.bucket.retry_after(), "rate_limited": True})
+                        continue
+                    if len(in_flight) >= FRAMES_WS_MAX_IN_FLIGHT:
+                        await reply({"seq": header.seq, "mode": header.mode, "error": "Server busy, retry later",
+                                     "retry_after": INFERENCE_RETRY_AFTER})
+                        continue
+                    task = asyncio.create_task(answer(header, payload))
+                    in_flight.add(task)
+                    task.add_done_callback(in_flight.discard)
+            except ValueError as e:
+                await reply({"error": str(e)})
+    except Exception as e:
+        print(f"Frame WebSocket {name} closed: {str(e)}")
+    finally:
+        for task in in_flight:
+            task.cancel()
+    print(f"Frame WebSocket {name} disconnected")
+
+@app.get("/metrics")
+async def metrics():
+    return metrics_response()
+
+@app.get("/devices")
+async def list_devices():
+    """Per-device throughput, latency and failure counts, plus how worker slots are shared"""
+    return {"devices": device_sessions.stats(), "sessions_refused": device_sessions.refused,
+            "scheduler": fair_scheduler.stats()}
+
+@app.get("/devices/{device_id}")
+async def get_device(device_id: str):
+    session = device_sessions.find(device_id)
+    if session is None:
+        return JSONResponse(status_code=404, content={"error": "Unknown device"})
+    return session.stats()
+
+@app.put("/devices/{device_id}")
+async def update_device(device_id: str, settings: DeviceSettings, request: Request):
+    """Change a device's target language or scheduling weight; only the device itself may do so"""
+    if settings.weight is not None and settings.weight <= 0:
+        return JSONResponse(status_code=400, content={"error": "weight must be positive"})
+    try:
+        session = device_sessions.authorize(request, device_id)
+    except UnknownDevice as e:
+        return JSONResponse(status_code=401, content={"error": str(e)})
+    except TooManyDevices as e:
+        return too_many_devices(e)
+    if settings.target_lang:
+        session.target_lang = settings.target_lang.lower()
+    if settings.weight is not None:
+        session.weight = settings.weight
+    return session.stats()
+
+@app.get("/devices/{device_id}/results")
+async def device_results(device_id: str, request: Request):
+    """Results produced for the device since the last call, oldest first; only the device may drain them"""
+    try:
+        session = device_sessions.authorize(request, device_id)
+    except UnknownDevice as e:
+        return JSONResponse(status_code=401, content={"error": str(e)})
+    except TooManyDevices as e:
+        return too_many_devices(e)
+    return {"results": session.drain_results()}
 
-        print(f"Received image: {width}x{height} {img_format}, size: {len(body)} bytes")
+@app.post("/upload")
+async def receive_image(request: Request):
+    return await handle_frame_request(request, "translate")
 
-        # Convert RGB565 to OpenCV format (BGR)
-        img = np.frombuffer(body, dtype=np.uint16).reshape((height, width))
-
-        # Convert RGB565 to RGB888
-        r = ((img & 0xF800) >> 11) * 8  # Extract 5 bits red and scale to 8 bits
-        g = ((img & 0x07E0) >> 5) * 4  # Extract 6 bits green and scale to 8 bits
-        b = (img & 0x001F) * 8  # Extract 5 bits blue and scale to 8 bits
-
-        # Create BGR image for OpenCV
-        bgr = np.zeros((height, width, 3), dtype=np.uint8)
-        bgr[:, :, 0] = b
-        bgr[:, :, 1] = g
-        bgr[:, :, 2] = r
-        rgb = cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB)
-        result = sign_language_from_image_array(rgb)
-        print(result)
-        # processed_img = cv2.GaussianBlur(bgr, (5, 5), 0)
-
-        # Save the processed image
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        original_filename = f"original_{timestamp}.jpg"
-        processed_filename = f"processed_{timestamp}.jpg"
-
-        cv2.imwrite(original_filename, rgb)
-        return {
-            "message": result,
-        }
-    except Exception as e:
-        print(f"Error processing image: {str(e)}")
-        return JSONResponse(
-            status_code=500,
-            content={"error": f"Failed to process image: {str(e)}"}
-        )
+@app.post("/sign_language")
+async def sign_language(request : Request):
+    return await handle_frame_request(request, "sign_language")
 
 
 if __name__ == "__main__":
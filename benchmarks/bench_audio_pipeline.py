@@ -0,0 +1,52 @@
+"""Offline benchmark of the speech pipeline: replay a WAV file through capture/VAD/recognize/translate.
+
+Run from the repository root:
+    python -m benchmarks.bench_audio_pipeline recording.wav [--fast] [--no-recognize]
+"""
+import argparse
+import asyncio
+import time
+
+import speech_recognition as sr
+
+from features.audio_pipeline import AudioPipeline, WavFileSource
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("wav", help="16-bit mono WAV file")
+    parser.add_argument("--fast", action="store_true", help="Read the file as fast as possible instead of real time")
+    parser.add_argument("--no-recognize", action="store_true",
+                        help="Skip Google recognition and only measure segmentation")
+    args = parser.parse_args()
+
+    recognizer = sr.Recognizer()
+
+    def recognize(audio: sr.AudioData):
+        if args.no_recognize:
+            return f"<{len(audio.frame_data) / (audio.sample_rate * audio.sample_width):.2f}s segment>"
+        try:
+            return recognizer.recognize_google(audio)
+        except sr.UnknownValueError:
+            return None
+
+    async def translate(text: str) -> str:
+        return text
+
+    async def publish(text: str):
+        pass
+
+    pipeline = AudioPipeline(WavFileSource(args.wav, realtime=not args.fast), recognize, translate, publish)
+    start = time.perf_counter()
+    asyncio.run(pipeline.run())
+    elapsed = time.perf_counter() - start
+
+    stats = pipeline.stats
+    published = stats["published"] or 1
+    print(f"wall time {elapsed:.2f} s | segments {stats['segments']} "
+          f"(dropped {stats['segments_dropped']}) | published {stats['published']} | "
+          f"mean speech-end to subtitle {stats['total_latency_ms'] / published:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Micro-benchmark: legacy RGB565 decode vs the shared LUT decoder.
+
+Run from the repository root:
+    python -m benchmarks.bench_rgb565
+"""
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+from features.rgb565 import decode_rgb565
+
+RESOLUTIONS = {
+    "VGA": (640, 480),
+    "SVGA": (800, 600),
+}
+
+
+def legacy_decode(body: bytes, width: int, height: int) -> np.ndarray:
+    """The decode that used to live in app.py, kept verbatim for comparison"""
+    img = np.frombuffer(body, dtype=np.uint16).reshape((height, width))
+    r = ((img & 0xF800) >> 11) * 8
+    g = ((img & 0x07E0) >> 5) * 4
+    b = (img & 0x001F) * 8
+    bgr = np.zeros((height, width, 3), dtype=np.uint8)
+    bgr[:, :, 0] = b
+    bgr[:, :, 1] = g
+    bgr[:, :, 2] = r
+    return cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB)
+
+
+def time_it(fn, iterations: int) -> float:
+    fn()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    for name, (width, height) in RESOLUTIONS.items():
+        body = rng.integers(0, 1 << 16, width * height, dtype=np.uint16).astype(">u2").tobytes()
+        out = np.empty((height, width, 3), dtype=np.uint8)
+
+        legacy_ms = time_it(lambda: legacy_decode(body, width, height), args.iterations)
+        lut_ms = time_it(lambda: decode_rgb565(body, width, height), args.iterations)
+        lut_out_ms = time_it(lambda: decode_rgb565(body, width, height, out=out), args.iterations)
+
+        print(f"{name} {width}x{height}: legacy {legacy_ms:.2f} ms | "
+              f"lut {lut_ms:.2f} ms | lut+out {lut_out_ms:.2f} ms | "
+              f"speedup {legacy_ms / lut_ms:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Full-text search benchmark: indexed /search queries against a LIKE scan of the same rows.
+
+Seeds --rows notes plus --rows/10 conversations through the normal insert path
+(so the index is maintained incrementally), then times each query both ways.
+Uses the database from EDITH_DATABASE_URL; point it at a scratch database.
+
+Run from the repository root:
+    EDITH_DATABASE_URL=sqlite+aiosqlite:///./search_bench.db python -m benchmarks.bench_search --rows 100000
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from sqlalchemy import or_, select
+
+from edith import Base, Conversation, Note, SessionLocal, dispose_engine, init_engine
+from features.search_index import create_search_index, search
+
+WORDS = ("meeting doctor groceries train ticket birthday invoice garden project deadline coffee "
+         "parents weekend library battery charger insurance passport holiday recipe tomatoes "
+         "laundry budget flight hotel museum concert painter plumber bicycle umbrella").split()
+SYLLABLES = "ka lo mi ne ru sa ti vo ze ba do fe gu hi ja ko lu ma no pe".split()
+# Rarer vocabulary (400 words) so queries are selective, like names and places in real notes
+RARE_WORDS = [a + b + "n" for a in SYLLABLES for b in SYLLABLES]
+PEOPLE = ["Ana", "Ben", "Chloe", "Dev", "Emma", "Farid"]
+QUERIES = ["kalon", "passport mirun", "zebon", "flight tijan", "dokan", "umbrella pepen"]
+INSERT_BATCH = 2000
+
+
+def sentence(rng, n):
+    words = [rng.choice(WORDS) for _ in range(n)] + [rng.choice(RARE_WORDS) for _ in range(max(1, n // 6))]
+    rng.shuffle(words)
+    return " ".join(words)
+
+
+async def seed(rows, rng):
+    async with init_engine().begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(create_search_index)
+    async with SessionLocal() as db:
+        existing = len((await db.execute(select(Note.id).limit(rows))).all())
+    if existing >= rows:
+        print(f"Reusing {existing} seeded notes")
+        return
+
+    start = time.perf_counter()
+    for offset in range(0, rows, INSERT_BATCH):
+        async with SessionLocal() as db:
+            count = min(INSERT_BATCH, rows - offset)
+            db.add_all(Note(note=sentence(rng, 12)) for _ in range(count))
+            db.add_all(
+                Conversation(person=rng.choice(PEOPLE), conversation=sentence(rng, 120), summary=sentence(rng, 20))
+                for _ in range(count // 10)
+            )
+            await db.commit()
+    elapsed = time.perf_counter() - start
+    print(f"Seeded {rows} notes + {rows // 10} conversations in {elapsed:.1f}s "
+          f"({rows * 1.1 / elapsed:.0f} rows/s with incremental indexing)")
+
+
+async def like_scan(db, query, limit):
+    """Today's alternative: scan every row for all terms (no ranking, so no early exit either)"""
+    terms = query.split()
+    notes = select(Note.id).where(*(Note.note.like(f"%{term}%") for term in terms))
+    conversations = select(Conversation.id).where(*(
+        or_(Conversation.conversation.like(f"%{term}%"), Conversation.summary.like(f"%{term}%")) for term in terms
+    ))
+    return (await db.execute(notes)).all() + (await db.execute(conversations)).all()
+
+
+async def time_queries(fn, repeats, limit):
+    timings = []
+    async with SessionLocal() as db:
+        for _ in range(repeats):
+            for query in QUERIES:
+                start = time.perf_counter()
+                await fn(db, query, limit)
+                timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+async def run(args):
+    rng = random.Random(7)
+    await seed(args.rows, rng)
+
+    indexed = await time_queries(lambda db, q, limit: search(db, q, limit=limit), args.repeats, args.limit)
+    scanned = await time_queries(like_scan, args.repeats, args.limit)
+    for name, timings in (("fts", indexed), ("like", scanned)):
+        ordered = sorted(timings)
+        print(f"{name:>5}: median {statistics.median(ordered):8.2f} ms  "
+              f"p95 {ordered[int(0.95 * (len(ordered) - 1))]:8.2f} ms  over {len(ordered)} queries")
+
+    async with SessionLocal() as db:
+        print("Sample:", (await search(db, QUERIES[0], limit=1)) or "no match")
+    await dispose_engine()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--limit", type=int, default=20)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
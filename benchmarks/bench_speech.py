@@ -0,0 +1,88 @@
+"""Compare speech backends on recorded WAV fixtures: latency, real-time factor and first partial.
+
+Run from the repository root:
+    python -m benchmarks.bench_speech path/to/wavs --backends google,vosk,whisper
+
+Each *.wav must be 16-bit mono. A sibling *.txt with the reference transcript is
+printed next to the hypothesis when present.
+"""
+import argparse
+import glob
+import os
+import statistics
+import time
+import wave
+
+import speech_recognition as sr
+
+from features.speech_backends import get_speech_backend
+
+CHUNK_SECONDS = 0.1
+
+
+def load_wav(path: str):
+    with wave.open(path, "rb") as wav:
+        if wav.getnchannels() != 1 or wav.getsampwidth() != 2:
+            raise ValueError(f"{path} must be 16-bit mono PCM")
+        return wav.readframes(wav.getnframes()), wav.getframerate()
+
+
+def first_partial_ms(backend, pcm: bytes, sample_rate: int):
+    """Time until the streaming API produces its first hypothesis, fed faster than real time"""
+    chunk_bytes = int(sample_rate * CHUNK_SECONDS) * 2
+    chunks = (pcm[i:i + chunk_bytes] for i in range(0, len(pcm), chunk_bytes))
+    start = time.perf_counter()
+    for _ in backend.stream(chunks, sample_rate):
+        return (time.perf_counter() - start) * 1000
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("fixtures", help="Directory of 16-bit mono WAV files")
+    parser.add_argument("--backends", default="google,vosk", help="Comma separated backend names")
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob(os.path.join(args.fixtures, "*.wav")))
+    if not paths:
+        parser.error(f"No .wav files in {args.fixtures}")
+    fixtures = [(path, *load_wav(path)) for path in paths]
+
+    for name in args.backends.split(","):
+        load_start = time.perf_counter()
+        try:
+            backend = get_speech_backend(name.strip())
+        except Exception as e:
+            print(f"[{name}] unavailable: {str(e)}")
+            continue
+        print(f"[{name}] loaded in {(time.perf_counter() - load_start) * 1000:.0f} ms")
+
+        latencies, audio_total, processing_total, partials = [], 0.0, 0.0, []
+        for path, pcm, sample_rate in fixtures:
+            duration = len(pcm) / (sample_rate * 2)
+            start = time.perf_counter()
+            try:
+                text = backend.recognize(sr.AudioData(pcm, sample_rate, 2))
+            except sr.RequestError as e:
+                text = f"<error: {e}>"
+            elapsed = time.perf_counter() - start
+            latencies.append(elapsed * 1000)
+            audio_total += duration
+            processing_total += elapsed
+
+            partial = first_partial_ms(backend, pcm, sample_rate)
+            if partial is not None:
+                partials.append(partial)
+
+            reference_path = os.path.splitext(path)[0] + ".txt"
+            reference = open(reference_path).read().strip() if os.path.exists(reference_path) else None
+            print(f"  {os.path.basename(path)} ({duration:.1f}s): {elapsed * 1000:.0f} ms "
+                  f"RTF {elapsed / duration:.2f} -> {text!r}" + (f" [ref {reference!r}]" if reference else ""))
+
+        print(f"[{name}] latency p50 {statistics.median(latencies):.0f} ms, max {max(latencies):.0f} ms, "
+              f"RTF {processing_total / audio_total:.2f}"
+              + (f", first partial p50 {statistics.median(partials):.0f} ms" if partials else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Measure the text presence gate against a labelled fixture set.
+
+Layout: <fixtures>/text/*.jpg holds frames with readable text, and
+<fixtures>/no_text/*.jpg holds frames without. The default is the synthetic set in
+benchmarks/fixtures/text_gate (see benchmarks.make_text_gate_fixtures); point it at
+labelled camera captures for real-world numbers. Thresholds come from the TEXT_GATE_*
+environment variables, so several settings can be compared run by run.
+
+Run from the repository root:
+    python -m benchmarks.bench_text_gate
+    python -m benchmarks.bench_text_gate path/to/fixtures --verbose
+"""
+import argparse
+import glob
+import os
+import statistics
+import time
+
+import cv2
+
+from benchmarks.make_text_gate_fixtures import DEFAULT_OUT
+from features.text_gate import detect_text
+
+
+def evaluate(paths):
+    verdicts, timings = [], []
+    for path in paths:
+        bgr = cv2.imread(path)
+        if bgr is None:
+            continue
+        rgb = cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB)
+        start = time.perf_counter()
+        result = detect_text(rgb)
+        timings.append((time.perf_counter() - start) * 1000)
+        verdicts.append((path, result.has_text, result.uncertain))
+    return verdicts, timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("fixtures", nargs="?", default=DEFAULT_OUT)
+    parser.add_argument("--verbose", action="store_true", help="List every misclassified frame")
+    args = parser.parse_args()
+
+    text, text_ms = evaluate(sorted(glob.glob(os.path.join(args.fixtures, "text", "*"))))
+    no_text, no_text_ms = evaluate(sorted(glob.glob(os.path.join(args.fixtures, "no_text", "*"))))
+    if not text or not no_text:
+        parser.error("Need images in both text/ and no_text/")
+
+    false_negatives = [path for path, has_text, _ in text if not has_text]
+    false_positives = [path for path, has_text, _ in no_text if has_text]
+    uncertain = sum(1 for _, _, borderline in text + no_text if borderline)
+    timings = text_ms + no_text_ms
+
+    print(f"false negative rate {len(false_negatives) / len(text):.1%} ({len(false_negatives)}/{len(text)})")
+    print(f"false positive rate {len(false_positives) / len(no_text):.1%} ({len(false_positives)}/{len(no_text)})")
+    print(f"upstream calls skipped {1 - len(false_positives) / len(no_text):.1%} of no-text frames")
+    print(f"borderline frames passed without cropping {uncertain}/{len(text) + len(no_text)}")
+    print(f"gate time p50 {statistics.median(timings):.1f} ms, max {max(timings):.1f} ms")
+    if args.verbose:
+        for path in false_negatives:
+            print(f"  missed text: {path}")
+        for path in false_positives:
+            print(f"  false alarm: {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,378 @@
+"""Replayable load test for app.py: N emulated ESP32 devices plus /audio-stream subscribers.
+
+Each device posts RGB565 frames with the firmware's X-Image-* headers at --fps to
+/upload or /sign_language (--sign-ratio), or with --transport ws streams them over
+one /frames WebSocket. Frames come from --frames-dir (raw
+*_WxH.rgb565 dumps from the camera) or are synthesized with the same seed every run.
+Repeats of a frame hit the server's frame cache, as a device aimed at a still scene
+would; start app.py with FRAME_CACHE_SIZE=0 to measure only the uncached path.
+Reports throughput, p50/p95/p99 latency per endpoint, server CPU per request and
+the per-stage means from /metrics, and saves it all as JSON.
+
+With --spawn the mock upstream (benchmarks.mock_groq) and app.py are started
+here, so runs are self-contained:
+
+Run from the repository root:
+    python -m benchmarks.load_devices --spawn --devices 8 --duration 60
+    python -m benchmarks.load_devices --url http://127.0.0.1:8000 --server-pid 1234 --compare old.json
+"""
+import argparse
+import asyncio
+import glob
+import json
+import os
+import random
+import re
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+import cv2
+import httpx
+import numpy as np
+
+from benchmarks.load_edith_writes import percentile
+from features.frame_protocol import encode_frame
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+SIGNS = [("SALIDA DE EMERGENCIA", "EMERGENCY EXIT"), ("SORTIE", "NE PAS ENTRER"), ("AUSGANG", "BITTE DRUCKEN"),
+         ("EMPUJE", "ABIERTO 9-18"), ("ALTO", "ZONA ESCOLAR"), ("FERME LE DIMANCHE", "MERCI")]
+
+
+# ---------- Frames ----------
+def encode_rgb565(rgb: np.ndarray, byte_order: str = "big") -> bytes:
+    """Pack an RGB888 array the way the ESP32 camera driver does"""
+    r = (rgb[:, :, 0].astype(np.uint16) >> 3) << 11
+    g = (rgb[:, :, 1].astype(np.uint16) >> 2) << 5
+    b = rgb[:, :, 2].astype(np.uint16) >> 3
+    return (r | g | b).astype(">u2" if byte_order == "big" else "<u2").tobytes()
+
+
+def synthetic_frames(count: int, width: int, height: int, seed: int, byte_order: str) -> list:
+    """Sign text at varying positions on a noisy, unevenly lit background, one distinct frame per index"""
+    rng = np.random.default_rng(seed)
+    frames = []
+    for i in range(count):
+        # Smooth lighting gradient plus mild sensor noise
+        shade = np.linspace(150, 220, width, dtype=np.float32)[None, :, None] + rng.integers(0, 30)
+        if i % 2:
+            shade = shade[:, ::-1]
+        noise = rng.normal(0, 3, (height, width, 3))
+        image = np.clip(shade + noise, 0, 255).astype(np.uint8)
+        scale = 0.8 * width / 320
+        for line, text in enumerate(SIGNS[i % len(SIGNS)]):
+            origin = (int(width * rng.uniform(0.02, 0.2)), int(height * (rng.uniform(0.2, 0.5) + 0.17 * line)))
+            cv2.putText(image, text, origin, cv2.FONT_HERSHEY_SIMPLEX, scale, (20, 20, 20), max(1, round(2 * scale)))
+        frames.append((width, height, encode_rgb565(image, byte_order)))
+    return frames
+
+
+def recorded_frames(directory: str) -> list:
+    frames = []
+    for path in sorted(glob.glob(os.path.join(directory, "*.rgb565"))):
+        match = re.search(r"(\d+)x(\d+)", os.path.basename(path))
+        if not match:
+            print(f"Skipping {path}: name must contain WIDTHxHEIGHT")
+            continue
+        with open(path, "rb") as f:
+            frames.append((int(match.group(1)), int(match.group(2)), f.read()))
+    return frames
+
+
+# ---------- Server process ----------
+def process_cpu_seconds(pid: int):
+    """User + system CPU time of a process from /proc, or None where that is not available"""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+async def wait_until_up(url: str, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                await client.get(url)
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {timeout:.0f}s")
+
+
+def spawn_servers(args) -> list:
+    mock = subprocess.Popen([sys.executable, "-m", "benchmarks.mock_groq", "--port", str(args.mock_port),
+                             "--latency-ms", str(args.mock_latency_ms), "--error-rate", str(args.mock_error_rate)])
+    env = dict(os.environ)
+    env.setdefault("GROQ_API_KEY_PRODUCT", "mock")
+    env.setdefault("ARCHIVE_EVERY_N", "0")
+    env["GROQ_BASE_URL"] = f"http://127.0.0.1:{args.mock_port}/openai/v1"
+    port = httpx.URL(args.url).port or 8000
+    server = subprocess.Popen([sys.executable, "-m", "uvicorn", "app:app", "--host", "127.0.0.1",
+                               "--port", str(port), "--log-level", "warning"], env=env)
+    return [mock, server]
+
+
+# ---------- Metrics ----------
+STAGE_LINE = re.compile(r'^edith_stage_seconds_(sum|count)\{stage="([^"]+)"\} (\S+)$')
+
+
+async def stage_totals(client: httpx.AsyncClient) -> dict:
+    try:
+        text = (await client.get("/metrics")).text
+    except httpx.HTTPError:
+        return {}
+    totals = {}
+    for line in text.splitlines():
+        match = STAGE_LINE.match(line)
+        if match:
+            totals.setdefault(match.group(2), {})[match.group(1)] = float(match.group(3))
+    return totals
+
+
+def stage_means(before: dict, after: dict) -> dict:
+    means = {}
+    for stage, values in after.items():
+        count = values.get("count", 0) - before.get(stage, {}).get("count", 0)
+        if count > 0:
+            total = values.get("sum", 0) - before.get(stage, {}).get("sum", 0)
+            means[stage] = {"count": int(count), "mean_ms": total / count * 1000}
+    return means
+
+
+# ---------- Load ----------
+async def device(index, args, frames, results, stop_at):
+    rng = random.Random(args.seed + index)
+    interval = 1 / args.fps if args.fps > 0 else 0
+    # One keep-alive connection per device, like the firmware's HTTP client
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout,
+                                 limits=httpx.Limits(max_connections=1)) as client:
+        next_send = time.monotonic() + rng.uniform(0, interval)
+        while time.monotonic() < stop_at:
+            await asyncio.sleep(max(0.0, next_send - time.monotonic()))
+            next_send += interval
+            width, height, body = frames[rng.randrange(len(frames))]
+            path = "/sign_language" if rng.random() < args.sign_ratio else "/upload"
+            headers = {"X-Image-Width": str(width), "X-Image-Height": str(height),
+                       "X-Image-Format": "rgb565", "X-Device-Id": f"esp32-{index:03d}"}
+            start = time.perf_counter()
+            try:
+                response = await client.post(path, content=body, headers=headers)
+                status = response.status_code
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            results.append((path, status, (time.perf_counter() - start) * 1000))
+
+
+async def device_ws(index, args, frames, results, stop_at):
+    """Same device, but every frame goes over one persistent /frames WebSocket"""
+    import websockets
+
+    rng = random.Random(args.seed + index)
+    interval = 1 / args.fps if args.fps > 0 else 0
+    pending = {}
+
+    async def receive(ws):
+        async for message in ws:
+            reply = json.loads(message)
+            sent = pending.pop(reply.get("seq"), None)
+            if sent is None:
+                continue
+            path, start = sent
+            if "error" not in reply:
+                status = 200
+            else:
+                status = (429 if reply.get("rate_limited") else 503 if "retry_after" in reply
+                          else 409 if reply.get("dropped") else 400)
+            results.append((path, status, (time.perf_counter() - start) * 1000))
+
+    # No permessage-deflate: raw RGB565 barely compresses and the ESP32 would not spend CPU on it
+    async with websockets.connect(args.url.replace("http", "ws", 1) + "/frames", max_size=None,
+                                  compression=None,
+                                  additional_headers={"X-Device-Id": f"esp32-{index:03d}"}) as ws:
+        receiver = asyncio.create_task(receive(ws))
+        next_send = time.monotonic() + rng.uniform(0, interval)
+        seq = 0
+        while time.monotonic() < stop_at:
+            await asyncio.sleep(max(0.0, next_send - time.monotonic()))
+            next_send += interval
+            width, height, body = frames[rng.randrange(len(frames))]
+            mode = "sign_language" if rng.random() < args.sign_ratio else "translate"
+            seq += 1
+            pending[seq] = (f"/frames:{mode}", time.perf_counter())
+            await ws.send(encode_frame(mode, "rgb565", width, height, seq, body))
+            if args.fps <= 0:
+                # Back to back means one frame in flight, like the HTTP client
+                while seq in pending and not receiver.done():
+                    await asyncio.sleep(0.001)
+        # Give the last answers a chance to arrive
+        deadline = time.monotonic() + args.timeout
+        while pending and time.monotonic() < deadline and not receiver.done():
+            await asyncio.sleep(0.01)
+        receiver.cancel()
+    for path, _ in pending.values():
+        results.append((path, "Timeout", args.timeout * 1000))
+
+
+async def subscriber(url, counts, stop_at):
+    import websockets
+
+    ws_url = url.replace("http", "ws", 1) + "/audio-stream"
+    try:
+        async with websockets.connect(ws_url) as ws:
+            counts["connected"] += 1
+            while time.monotonic() < stop_at:
+                try:
+                    message = await asyncio.wait_for(ws.recv(), timeout=max(0.1, stop_at - time.monotonic()))
+                except asyncio.TimeoutError:
+                    break
+                counts["messages"] += len(str(message).split("\n"))
+    except Exception as e:
+        counts["errors"] += 1
+        print(f"Subscriber failed: {str(e)}")
+
+
+def summarize(results, elapsed):
+    report = {}
+    for path in sorted({path for path, _, _ in results}):
+        rows = [(status, ms) for p, status, ms in results if p == path]
+        ok = [ms for status, ms in rows if status == 200]
+        statuses = {}
+        for status, _ in rows:
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+        report[path] = {
+            "requests": len(rows),
+            "ok": len(ok),
+            "throughput_rps": len(ok) / elapsed,
+            "p50_ms": percentile(ok, 50) if ok else None,
+            "p95_ms": percentile(ok, 95) if ok else None,
+            "p99_ms": percentile(ok, 99) if ok else None,
+            "statuses": statuses,
+        }
+    return report
+
+
+def print_comparison(current: dict, previous_path: str):
+    with open(previous_path) as f:
+        previous = json.load(f)
+    print(f"\nCompared with {previous_path} ({previous.get('git_rev')}):")
+    for path, now in current["endpoints"].items():
+        before = previous.get("endpoints", {}).get(path)
+        if not before:
+            continue
+        for key in ("throughput_rps", "p50_ms", "p95_ms", "p99_ms"):
+            if now[key] is not None and before.get(key):
+                print(f"  {path:15} {key:15} {before[key]:9.1f} -> {now[key]:9.1f} "
+                      f"({(now[key] / before[key] - 1) * 100:+.1f}%)")
+
+
+async def run(args):
+    if args.frames_dir:
+        frames = recorded_frames(args.frames_dir)
+    else:
+        frames = synthetic_frames(args.frame_count, args.width, args.height, args.seed, args.byte_order)
+    if not frames:
+        raise SystemExit("No frames to send")
+
+    processes = spawn_servers(args) if args.spawn else []
+    server_pid = processes[1].pid if processes else args.server_pid
+    try:
+        await wait_until_up(args.url + "/metrics")
+        async with httpx.AsyncClient(base_url=args.url) as client:
+            stages_before = await stage_totals(client)
+            cpu_before = process_cpu_seconds(server_pid) if server_pid else None
+            client_cpu_before = time.process_time()
+
+            results, counts = [], {"connected": 0, "messages": 0, "errors": 0}
+            start = time.perf_counter()
+            stop_at = time.monotonic() + args.duration
+            await asyncio.gather(
+                *((device_ws if args.transport == "ws" else device)(i, args, frames, results, stop_at)
+                  for i in range(args.devices)),
+                *(subscriber(args.url, counts, stop_at) for _ in range(args.subscribers)),
+            )
+            elapsed = time.perf_counter() - start
+
+            cpu_after = process_cpu_seconds(server_pid) if server_pid else None
+            stages_after = await stage_totals(client)
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait(timeout=10)
+
+    completed = sum(1 for _, status, _ in results if status == 200)
+    server_cpu = cpu_after - cpu_before if cpu_before is not None and cpu_after is not None else None
+    report = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "git_rev": git_rev(),
+        "config": {key: value for key, value in vars(args).items() if key != "compare"},
+        "elapsed_s": elapsed,
+        "frames": len(frames),
+        "endpoints": summarize(results, elapsed),
+        "server_cpu_s": server_cpu,
+        "server_cpu_ms_per_request": server_cpu / completed * 1000 if server_cpu is not None and completed else None,
+        "client_cpu_s": time.process_time() - client_cpu_before,
+        "subscribers": counts,
+        "stages": stage_means(stages_before, stages_after),
+    }
+
+    for path, stats in report["endpoints"].items():
+        p50, p95, p99 = (stats[key] if stats[key] is not None else float("nan") for key in ("p50_ms", "p95_ms", "p99_ms"))
+        print(f"{path:15} {stats['ok']:6}/{stats['requests']:<6} ok  {stats['throughput_rps']:7.1f} req/s  "
+              f"p50 {p50:8.1f}  p95 {p95:8.1f}  p99 {p99:8.1f} ms  {stats['statuses']}")
+    if report["server_cpu_ms_per_request"] is not None:
+        print(f"Server CPU: {report['server_cpu_s']:.2f}s, {report['server_cpu_ms_per_request']:.1f} ms per request")
+    print(f"Subscribers: {counts}")
+    for stage, stats in sorted(report["stages"].items(), key=lambda item: -item[1]["mean_ms"]):
+        print(f"  {stage:28} {stats['count']:7}  {stats['mean_ms']:9.2f} ms")
+
+    output = args.output or os.path.join(RESULTS_DIR, datetime.now().strftime("load_devices_%Y%m%d_%H%M%S.json"))
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Saved {output}")
+    if args.compare:
+        print_comparison(report, args.compare)
+
+
+def git_rev():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--devices", type=int, default=4)
+    parser.add_argument("--subscribers", type=int, default=2, help="/audio-stream WebSocket clients")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds of load")
+    parser.add_argument("--fps", type=float, default=1.0, help="Frames per second per device (0 = back to back)")
+    parser.add_argument("--sign-ratio", type=float, default=0.3, help="Share of frames sent to /sign_language")
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--transport", choices=["http", "ws"], default="http",
+                        help="POST per frame, or one /frames WebSocket per device")
+    parser.add_argument("--frames-dir", help="Directory of recorded *_WxH.rgb565 frames")
+    parser.add_argument("--frame-count", type=int, default=20)
+    parser.add_argument("--width", type=int, default=320)
+    parser.add_argument("--height", type=int, default=240)
+    parser.add_argument("--byte-order", choices=["big", "little"], default="big")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--spawn", action="store_true", help="Start the mock upstream and app.py here")
+    parser.add_argument("--mock-port", type=int, default=9000)
+    parser.add_argument("--mock-latency-ms", type=float, default=300)
+    parser.add_argument("--mock-error-rate", type=float, default=0.0)
+    parser.add_argument("--server-pid", type=int, help="PID of a running app.py, for CPU accounting")
+    parser.add_argument("--output", help="Result JSON path (default benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--compare", help="Earlier result JSON to compare against")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Concurrent write load test for edith.py: p50/p95/p99 latency and throughput.
+
+Runs in-process against the ASGI app (database from EDITH_DATABASE_URL), or
+against a running server with --url. --batch N posts N rows per request to the
+:batch endpoints; set WRITE_BEHIND_MODE=group to measure the write-behind buffer.
+
+Run from the repository root:
+    EDITH_DATABASE_URL=sqlite+aiosqlite:///./load.db python -m benchmarks.load_edith_writes
+    python -m benchmarks.load_edith_writes --url http://127.0.0.1:8000 --concurrency 64
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+async def writer(client, path, payload_key, batch, requests_per_worker, latencies, errors):
+    for i in range(requests_per_worker):
+        if batch:
+            payload = [{payload_key: f"load test {i}.{j}"} for j in range(batch)]
+        else:
+            payload = {payload_key: f"load test {i}"}
+        start = time.perf_counter()
+        try:
+            response = await client.post(path, json=payload)
+            response.raise_for_status()
+        except Exception:
+            errors.append(1)
+            continue
+        latencies.append((time.perf_counter() - start) * 1000)
+
+
+async def run(args):
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, timeout=60)
+        shutdown = None
+    else:
+        import edith
+        lifespan = edith.app.router.lifespan_context(edith.app)
+        await lifespan.__aenter__()
+        shutdown = lifespan.__aexit__
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=edith.app),
+                                   base_url="http://edith", timeout=60)
+
+    path, key = ("/alert", "alert") if args.kind == "alert" else ("/note", "note")
+    if args.batch:
+        path = "/alerts:batch" if args.kind == "alert" else "/notes:batch"
+    latencies, errors = [], []
+    per_worker = max(1, args.requests // args.concurrency)
+    start = time.perf_counter()
+    async with client:
+        await asyncio.gather(*(writer(client, path, key, args.batch, per_worker, latencies, errors)
+                               for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - start
+    if shutdown is not None:
+        await shutdown(None, None, None)
+
+    rows = len(latencies) * (args.batch or 1)
+    print(f"{len(latencies)} {args.kind} requests, {rows} rows ({len(errors)} errors) at concurrency "
+          f"{args.concurrency} in {elapsed:.2f} s -> {len(latencies) / elapsed:.0f} requests/s, "
+          f"{rows / elapsed:.0f} rows/s")
+    if latencies:
+        print(f"latency p50 {statistics.median(latencies):.1f} ms | p95 {percentile(latencies, 95):.1f} ms | "
+              f"p99 {percentile(latencies, 99):.1f} ms | max {max(latencies):.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="Base URL of a running edith server; default is in-process")
+    parser.add_argument("--kind", choices=("alert", "note"), default="alert")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--batch", type=int, default=0, help="Rows per request via the :batch endpoint")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
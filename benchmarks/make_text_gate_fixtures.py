@@ -0,0 +1,175 @@
+"""Generate the labelled fixture set used by bench_text_gate.
+
+Writes <out>/text/*.jpg (signs the gate must pass) and <out>/no_text/*.jpg
+(scenes it may skip). Every frame is drawn from a fixed seed, so the set is
+reproducible; the committed copy under benchmarks/fixtures/text_gate was made
+with the defaults. Text frames cover small and close-up lettering, one- and
+two-line signs, light-on-dark plates, several fonts, slight rotation and blur.
+No-text frames are gradients, sensor noise, soft blobs, shapes, stripes and tiles.
+
+Run from the repository root:
+    python -m benchmarks.make_text_gate_fixtures
+    python -m benchmarks.make_text_gate_fixtures --out /tmp/fixtures --seed 7
+"""
+import argparse
+import os
+
+import cv2
+import numpy as np
+
+from benchmarks.load_devices import SIGNS
+
+DEFAULT_OUT = os.path.join("benchmarks", "fixtures", "text_gate")
+WORDS = ["EMERGENCY EXIT", "NO ENTRY", "PUSH", "EXIT", "PLATFORM 2", "TICKETS", "CAUTION WET FLOOR",
+         "OPEN", "PHARMACY", "KEEP LEFT", "Ausgang", "Salida", "TOILETS", "STOP"]
+FONTS = [cv2.FONT_HERSHEY_SIMPLEX, cv2.FONT_HERSHEY_DUPLEX, cv2.FONT_HERSHEY_COMPLEX, cv2.FONT_HERSHEY_PLAIN]
+
+
+def background(rng, width: int, height: int, low: int = 140, high: int = 225) -> np.ndarray:
+    """Unevenly lit surface with mild sensor noise"""
+    base = rng.integers(low, high - 40)
+    shade = np.linspace(base, base + rng.integers(10, 40), width, dtype=np.float32)[None, :, None]
+    if rng.random() < 0.5:
+        shade = shade[:, ::-1]
+    tint = rng.integers(-10, 10, 3)[None, None, :]
+    return np.clip(shade + tint + rng.normal(0, 3, (height, width, 3)), 0, 255).astype(np.uint8)
+
+
+def put_centered(image, text: str, scale: float, font, color, thickness: int, rng):
+    height, width = image.shape[:2]
+    (text_w, text_h), _ = cv2.getTextSize(text, font, scale, thickness)
+    x = int(np.clip((width - text_w) / 2 + rng.uniform(-0.1, 0.1) * width, 0, max(0, width - text_w)))
+    y = int(np.clip((height + text_h) / 2 + rng.uniform(-0.2, 0.2) * height, text_h, height - 2))
+    cv2.putText(image, text, (x, y), font, scale, color, thickness, cv2.LINE_AA)
+    return x, y, text_w, text_h
+
+
+def rotate(image, degrees: float):
+    height, width = image.shape[:2]
+    matrix = cv2.getRotationMatrix2D((width / 2, height / 2), degrees, 1.0)
+    return cv2.warpAffine(image, matrix, (width, height), borderMode=cv2.BORDER_REPLICATE)
+
+
+# ---------- Frames with text ----------
+def small_sign(rng, i):
+    image = background(rng, 640, 480)
+    scale = rng.uniform(0.7, 1.2)
+    put_centered(image, WORDS[i % len(WORDS)], scale, FONTS[i % 3], (25, 25, 25), max(1, round(2 * scale)), rng)
+    return image
+
+
+def close_up(rng, i):
+    # Lettering that fills much of the frame, as when standing right in front of a sign
+    image = background(rng, 800, 600)
+    text = ["EMERGENCY EXIT", "NO ENTRY", "EXIT", "PUSH", "STOP", "OPEN"][i % 6]
+    scale = rng.uniform(2.5, 3.0) if len(text) > 8 else rng.uniform(3.0, 5.0)
+    put_centered(image, text, scale, FONTS[i % 2], (20, 20, 20), max(2, round(2.5 * scale)), rng)
+    return image
+
+
+def two_line(rng, i):
+    image = background(rng, 320, 240)
+    scale = 0.8
+    for line, text in enumerate(SIGNS[i % len(SIGNS)]):
+        origin = (int(320 * rng.uniform(0.02, 0.2)), int(240 * (rng.uniform(0.2, 0.5) + 0.17 * line)))
+        cv2.putText(image, text, origin, cv2.FONT_HERSHEY_SIMPLEX, scale, (20, 20, 20), 2)
+    return image
+
+
+def plate(rng, i):
+    # Light lettering on a dark plate, e.g. a platform or street sign
+    image = background(rng, 640, 480)
+    color = tuple(int(c) for c in rng.integers(20, 90, 3))
+    x0, y0 = int(rng.integers(40, 160)), int(rng.integers(120, 240))
+    cv2.rectangle(image, (x0, y0), (x0 + 420, y0 + 110), color, -1)
+    scale = rng.uniform(1.1, 1.5)
+    cv2.putText(image, WORDS[i % len(WORDS)][:12], (x0 + 20, y0 + 72), FONTS[i % 3], scale, (240, 240, 240),
+                max(2, round(2 * scale)), cv2.LINE_AA)
+    return image
+
+
+def rotated_blurred(rng, i):
+    image = small_sign(rng, i + 3)
+    image = rotate(image, rng.uniform(-8, 8))
+    return cv2.GaussianBlur(image, (3, 3), 0) if i % 2 else image
+
+
+TEXT_KINDS = [("small", small_sign), ("closeup", close_up), ("twoline", two_line), ("plate", plate),
+              ("rotated", rotated_blurred)]
+
+
+# ---------- Frames without text ----------
+def gradient(rng, i):
+    return background(rng, 640, 480)
+
+
+def noise(rng, i):
+    image = background(rng, 640, 480)
+    return np.clip(image + rng.normal(0, rng.uniform(6, 14), image.shape), 0, 255).astype(np.uint8)
+
+
+def blobs(rng, i):
+    # Low-frequency noise blown up: soft shapes like foliage or a blurred room
+    small = rng.integers(40, 220, (6, 8, 3)).astype(np.uint8)
+    return cv2.GaussianBlur(cv2.resize(small, (640, 480), interpolation=cv2.INTER_CUBIC), (31, 31), 0)
+
+
+def shapes(rng, i):
+    image = background(rng, 640, 480)
+    for _ in range(rng.integers(1, 4)):
+        color = tuple(int(c) for c in rng.integers(0, 255, 3))
+        if rng.random() < 0.5:
+            cv2.circle(image, tuple(int(v) for v in rng.integers(80, 400, 2)), int(rng.integers(30, 120)), color, -1)
+        else:
+            x, y = (int(v) for v in rng.integers(20, 300, 2))
+            cv2.rectangle(image, (x, y), (x + int(rng.integers(100, 300)), y + int(rng.integers(120, 200))),
+                          color, int(rng.choice([-1, 4])))
+    return image
+
+
+def stripes(rng, i):
+    # Wood grain / blinds: regular but smooth bands
+    y = np.arange(480, dtype=np.float32)[:, None, None]
+    period = rng.uniform(25, 60)
+    image = 150 + 50 * np.sin(2 * np.pi * y / period) + np.zeros((480, 640, 3), np.float32)
+    return np.clip(image + rng.normal(0, 3, image.shape), 0, 255).astype(np.uint8)
+
+
+def tiles(rng, i):
+    image = background(rng, 640, 480)
+    step = int(rng.integers(60, 110))
+    for x in range(0, 640, step):
+        cv2.line(image, (x, 0), (x, 479), (120, 120, 120), 2)
+    for y in range(0, 480, step):
+        cv2.line(image, (0, y), (639, y), (120, 120, 120), 2)
+    return image
+
+
+NO_TEXT_KINDS = [("gradient", gradient), ("noise", noise), ("blobs", blobs), ("shapes", shapes),
+                 ("stripes", stripes), ("tiles", tiles)]
+
+
+def write(path: str, image_rgb: np.ndarray):
+    cv2.imwrite(path, cv2.cvtColor(image_rgb, cv2.COLOR_RGB2BGR), [cv2.IMWRITE_JPEG_QUALITY, 75])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--out", default=DEFAULT_OUT)
+    parser.add_argument("--per-kind", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    for label, kinds in (("text", TEXT_KINDS), ("no_text", NO_TEXT_KINDS)):
+        directory = os.path.join(args.out, label)
+        os.makedirs(directory, exist_ok=True)
+        for name, draw in kinds:
+            for i in range(args.per_kind):
+                write(os.path.join(directory, f"{name}_{i:02d}.jpg"), draw(rng, i))
+    print(f"Wrote {len(TEXT_KINDS) * args.per_kind} text and {len(NO_TEXT_KINDS) * args.per_kind} "
+          f"no-text frames to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
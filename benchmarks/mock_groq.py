@@ -0,0 +1,108 @@
+"""Local stand-in for the Groq chat-completions API with configurable latency and errors.
+
+Latency is log-normal around --latency-ms (spread set by --sigma); --error-rate of
+calls get a 429 or 500 so the client's retry path is exercised too. Point app.py at it:
+
+Run from the repository root:
+    python -m benchmarks.mock_groq --port 9000 --latency-ms 400 --error-rate 0.02
+    GROQ_BASE_URL=http://127.0.0.1:9000/openai/v1 GROQ_API_KEY_PRODUCT=mock python app.py
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+SIGNS = ["hello", "thank you", "yes", "no", "please", "help"]
+PHRASES = [("hola mundo", "es", "hello world"), ("bonjour", "fr", "good morning"),
+           ("sortie", "fr", "exit"), ("salida de emergencia", "es", "emergency exit")]
+
+
+class UpstreamProfile:
+    def __init__(self, latency_ms: float, sigma: float, vision_factor: float, error_rate: float, seed: int):
+        self.latency_ms = latency_ms
+        self.sigma = sigma
+        self.vision_factor = vision_factor
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.calls = 0
+        self.errors = 0
+
+    def delay(self, vision: bool) -> float:
+        median = self.latency_ms * (self.vision_factor if vision else 1.0)
+        return median * self.rng.lognormvariate(0, self.sigma) / 1000
+
+
+def _prompt(messages: list) -> tuple:
+    """Prompt text of the last message and whether it carries an image"""
+    content = messages[-1]["content"] if messages else ""
+    if isinstance(content, str):
+        return content, False
+    text = " ".join(part.get("text", "") for part in content if part.get("type") == "text")
+    return text, any(part.get("type") == "image_url" for part in content)
+
+
+def fake_reply(payload: dict, rng: random.Random) -> str:
+    prompt, has_image = _prompt(payload.get("messages", []))
+    source, language, translation = rng.choice(PHRASES)
+    if payload.get("response_format", {}).get("type") == "json_object":
+        return json.dumps({"text": source, "language": language, "translation": translation})
+    if has_image and "sign" in prompt.lower():
+        return rng.choice(SIGNS)
+    if has_image:
+        return source
+    return translation
+
+
+def create_app(profile: UpstreamProfile) -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/openai/v1/chat/completions")
+    @app.post("/chat/completions")
+    async def chat_completions(request: Request):
+        payload = await request.json()
+        profile.calls += 1
+        _, has_image = _prompt(payload.get("messages", []))
+        await asyncio.sleep(profile.delay(has_image))
+        if profile.rng.random() < profile.error_rate:
+            profile.errors += 1
+            status = profile.rng.choice([429, 500])
+            headers = {"Retry-After": "0.2"} if status == 429 else {}
+            return JSONResponse(status_code=status, content={"error": {"message": "mock failure"}}, headers=headers)
+        return {
+            "id": f"mock-{profile.calls}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": payload.get("model"),
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": fake_reply(payload, profile.rng)}}],
+        }
+
+    @app.get("/stats")
+    async def stats():
+        return {"calls": profile.calls, "errors": profile.errors}
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--latency-ms", type=float, default=300, help="Median latency of a text call")
+    parser.add_argument("--sigma", type=float, default=0.35, help="Log-normal spread of the latency")
+    parser.add_argument("--vision-factor", type=float, default=2.0, help="Image calls are this much slower")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    profile = UpstreamProfile(args.latency_ms, args.sigma, args.vision_factor, args.error_rate, args.seed)
+    uvicorn.run(create_app(profile), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
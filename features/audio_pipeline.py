@@ -0,0 +1,318 @@
+import asyncio
+import threading
+import time
+import wave
+from collections import deque
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional
+
+import numpy as np
+import speech_recognition as sr
+
+from config import (AUDIO_SOURCE, AUDIO_WAV_PATH, AUDIO_SAMPLE_RATE, AUDIO_CHUNK_MS,
+                    VAD_CALIBRATION_SECONDS, VAD_RECALIBRATE_SECONDS, VAD_ENERGY_MULTIPLIER,
+                    VAD_MIN_ENERGY, VAD_PRE_ROLL_SECONDS, VAD_PAUSE_SECONDS, VAD_MIN_SPEECH_SECONDS,
+                    VAD_MAX_SEGMENT_SECONDS, AUDIO_SEGMENT_QUEUE_SIZE, AUDIO_TEXT_QUEUE_SIZE)
+from features.metrics import observe_payload, observe_stage, span, track_queue
+
+
+# ---------- Audio sources ----------
+class AudioSource:
+    """Yields fixed-size chunks of 16-bit mono PCM; read() returns None at end of stream"""
+    sample_rate: int
+    sample_width: int
+    chunk_frames: int
+
+    def open(self):
+        pass
+
+    def read(self) -> Optional[bytes]:
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class MicrophoneSource(AudioSource):
+    """Continuous capture from the default (or given) microphone"""
+
+    def __init__(self, sample_rate: int = AUDIO_SAMPLE_RATE, chunk_ms: int = AUDIO_CHUNK_MS,
+                 device_index: Optional[int] = None):
+        self.sample_rate = sample_rate
+        self.chunk_frames = sample_rate * chunk_ms // 1000
+        self.device_index = device_index
+        self.sample_width = 2
+        self._mic = None
+
+    def open(self):
+        self._mic = sr.Microphone(device_index=self.device_index, sample_rate=self.sample_rate,
+                                  chunk_size=self.chunk_frames)
+        self._mic.__enter__()
+        self.sample_width = self._mic.SAMPLE_WIDTH
+
+    def read(self) -> Optional[bytes]:
+        return self._mic.stream.read(self.chunk_frames)
+
+    def close(self):
+        if self._mic is not None:
+            self._mic.__exit__(None, None, None)
+            self._mic = None
+
+
+class WavFileSource(AudioSource):
+    """Replays a 16-bit mono WAV file, optionally paced at real time"""
+
+    def __init__(self, path: str, chunk_ms: int = AUDIO_CHUNK_MS, realtime: bool = True):
+        self.path = path
+        self.chunk_ms = chunk_ms
+        self.realtime = realtime
+        self._wav = None
+        self._next_at = 0.0
+
+    def open(self):
+        self._wav = wave.open(self.path, "rb")
+        if self._wav.getnchannels() != 1 or self._wav.getsampwidth() != 2:
+            raise ValueError(f"{self.path} must be 16-bit mono PCM")
+        self.sample_rate = self._wav.getframerate()
+        self.sample_width = 2
+        self.chunk_frames = self.sample_rate * self.chunk_ms // 1000
+        self._next_at = time.monotonic()
+
+    def read(self) -> Optional[bytes]:
+        data = self._wav.readframes(self.chunk_frames)
+        if not data:
+            return None
+        if self.realtime:
+            # Sleep until the moment a live microphone would have delivered this chunk
+            self._next_at += self.chunk_ms / 1000
+            delay = self._next_at - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        return data
+
+    def close(self):
+        if self._wav is not None:
+            self._wav.close()
+            self._wav = None
+
+
+def make_audio_source() -> AudioSource:
+    """Audio source selected by AUDIO_SOURCE"""
+    if AUDIO_SOURCE == "wav":
+        return WavFileSource(AUDIO_WAV_PATH)
+    return MicrophoneSource()
+
+
+# ---------- Voice activity segmentation ----------
+def chunk_energy(chunk: bytes) -> float:
+    samples = np.frombuffer(chunk, dtype=np.int16).astype(np.float32)
+    return float(np.sqrt(np.mean(samples * samples))) if samples.size else 0.0
+
+
+@dataclass
+class SpeechSegment:
+    audio: bytes
+    sample_rate: int
+    sample_width: int
+    ended_at: float  # time.monotonic() when the last chunk was captured
+
+    def to_audio_data(self) -> sr.AudioData:
+        return sr.AudioData(self.audio, self.sample_rate, self.sample_width)
+
+
+class EnergyVAD:
+    """Energy-threshold segmenter with a pre-roll ring buffer and a tracked noise floor"""
+
+    def __init__(self, chunk_seconds: float):
+        self.chunk_seconds = chunk_seconds
+        self.noise_floor = None
+        self._calibration = []
+        self._calibration_chunks = max(1, int(VAD_CALIBRATION_SECONDS / chunk_seconds))
+        self._noise_samples = deque(maxlen=max(1, int(VAD_RECALIBRATE_SECONDS / chunk_seconds)))
+        self._recalibrate_every = max(1, int(VAD_RECALIBRATE_SECONDS / chunk_seconds))
+        self._since_calibration = 0
+        # Chunks from just before speech starts, so word onsets are never clipped
+        self._pre_roll = deque(maxlen=max(1, int(VAD_PRE_ROLL_SECONDS / chunk_seconds)))
+        self._segment = []
+        self._speech_chunks = 0
+        self._silent_chunks = 0
+        self._pause_chunks = max(1, int(VAD_PAUSE_SECONDS / chunk_seconds))
+        self._min_speech_chunks = max(1, int(VAD_MIN_SPEECH_SECONDS / chunk_seconds))
+        self._max_chunks = max(1, int(VAD_MAX_SEGMENT_SECONDS / chunk_seconds))
+
+    @property
+    def calibrated(self) -> bool:
+        return self.noise_floor is not None
+
+    @property
+    def threshold(self) -> float:
+        return max(VAD_MIN_ENERGY, (self.noise_floor or 0.0) * VAD_ENERGY_MULTIPLIER)
+
+    def feed(self, chunk: bytes) -> Optional[bytes]:
+        """Consume one chunk; returns the audio of a finished segment, if any"""
+        energy = chunk_energy(chunk)
+
+        if not self.calibrated:
+            # One-time calibration on the first second of audio
+            self._calibration.append(energy)
+            if len(self._calibration) >= self._calibration_chunks:
+                self.noise_floor = float(np.median(self._calibration))
+                print(f"[VAD] Calibrated noise floor {self.noise_floor:.0f}, threshold {self.threshold:.0f}")
+            return None
+
+        is_speech = energy > self.threshold
+
+        if not self._segment:
+            if not is_speech:
+                self._pre_roll.append(chunk)
+                self._track_noise(energy)
+                return None
+            self._segment = list(self._pre_roll)
+            self._pre_roll.clear()
+            self._speech_chunks = 0
+            self._silent_chunks = 0
+
+        self._segment.append(chunk)
+        if is_speech:
+            self._speech_chunks += 1
+            self._silent_chunks = 0
+        else:
+            self._silent_chunks += 1
+
+        if self._silent_chunks >= self._pause_chunks or len(self._segment) >= self._max_chunks:
+            segment, speech_chunks = self._segment, self._speech_chunks
+            self._segment = []
+            if speech_chunks < self._min_speech_chunks:
+                return None
+            return b"".join(segment)
+        return None
+
+    def _track_noise(self, energy: float):
+        # Periodic re-calibration from silent chunks only, so capture never pauses
+        self._noise_samples.append(energy)
+        self._since_calibration += 1
+        if self._since_calibration >= self._recalibrate_every:
+            self._since_calibration = 0
+            self.noise_floor = float(np.median(self._noise_samples))
+            print(f"[VAD] Re-calibrated noise floor {self.noise_floor:.0f}")
+
+
+# ---------- Pipeline ----------
+def _put_drop_oldest(queue: asyncio.Queue, item) -> bool:
+    """Enqueue without blocking; evicts the oldest item when full. Returns False if one was dropped."""
+    dropped = False
+    if queue.full():
+        queue.get_nowait()
+        dropped = True
+    queue.put_nowait(item)
+    return not dropped
+
+
+class AudioPipeline:
+    """Capture -> recognize -> translate, run as overlapping stages joined by bounded queues"""
+
+    def __init__(self, source: AudioSource,
+                 recognize: Callable[[sr.AudioData], Optional[str]],
+                 translate: Callable[[str], Awaitable[str]],
+                 publish: Callable[[str], Awaitable[None]],
+                 segment_queue_size: int = AUDIO_SEGMENT_QUEUE_SIZE,
+                 text_queue_size: int = AUDIO_TEXT_QUEUE_SIZE):
+        self.source = source
+        self.recognize = recognize
+        self.translate = translate
+        self.publish = publish
+        self._segments = asyncio.Queue(maxsize=segment_queue_size)
+        self._texts = asyncio.Queue(maxsize=text_queue_size)
+        self._stop = threading.Event()
+        track_queue("audio_segments", self._segments.qsize)
+        track_queue("audio_texts", self._texts.qsize)
+        self.stats = {
+            "segments": 0,
+            "segments_dropped": 0,
+            "recognized": 0,
+            "unrecognized": 0,
+            "texts_dropped": 0,
+            "published": 0,
+            "last_latency_ms": 0.0,
+            "total_latency_ms": 0.0,
+        }
+
+    # Runs on a dedicated thread: never waits on recognition or translation
+    def _capture(self, loop: asyncio.AbstractEventLoop):
+        self.source.open()
+        try:
+            vad = EnergyVAD(self.source.chunk_frames / self.source.sample_rate)
+            while not self._stop.is_set():
+                chunk = self.source.read()
+                if chunk is None:
+                    break
+                audio = vad.feed(chunk)
+                if audio is not None:
+                    segment = SpeechSegment(audio, self.source.sample_rate, self.source.sample_width,
+                                            time.monotonic())
+                    loop.call_soon_threadsafe(self._enqueue_segment, segment)
+        finally:
+            self.source.close()
+            loop.call_soon_threadsafe(self._enqueue_segment, None)
+
+    def _enqueue_segment(self, segment: Optional[SpeechSegment]):
+        if segment is not None:
+            self.stats["segments"] += 1
+        if not _put_drop_oldest(self._segments, segment):
+            self.stats["segments_dropped"] += 1
+
+    async def _recognize_stage(self):
+        while True:
+            segment = await self._segments.get()
+            if segment is None:
+                await self._texts.put(None)
+                return
+            observe_payload("speech_segment", len(segment.audio))
+            with span("speech_recognition"):
+                text = await asyncio.to_thread(self.recognize, segment.to_audio_data())
+            if not text:
+                self.stats["unrecognized"] += 1
+                print("No recognizable audio")
+                continue
+            self.stats["recognized"] += 1
+            if not _put_drop_oldest(self._texts, (text, segment.ended_at)):
+                self.stats["texts_dropped"] += 1
+
+    async def _translate_stage(self):
+        while True:
+            item = await self._texts.get()
+            if item is None:
+                return
+            text, ended_at = item
+            try:
+                with span("speech_translation"):
+                    translated_text = await self.translate(text)
+            except Exception as e:
+                print(f"Error translating speech: {str(e)}")
+                continue
+            await self.publish(translated_text)
+            latency_ms = (time.monotonic() - ended_at) * 1000
+            observe_stage("speech_end_to_publish", latency_ms / 1000)
+            self.stats["published"] += 1
+            self.stats["last_latency_ms"] = latency_ms
+            self.stats["total_latency_ms"] += latency_ms
+            print(f"Queued: {translated_text} ({latency_ms:.0f} ms after speech ended)")
+
+    async def run(self):
+        """Run until the source is exhausted or the task is cancelled"""
+        loop = asyncio.get_running_loop()
+        self._stop.clear()
+        capture = loop.run_in_executor(None, self._capture, loop)
+        stages = [asyncio.ensure_future(self._recognize_stage()), asyncio.ensure_future(self._translate_stage())]
+        try:
+            # A failing stage must stop capture too, or the pipeline stalls with nobody reading the error
+            done, _ = await asyncio.wait([capture, *stages], return_when=asyncio.FIRST_EXCEPTION)
+            for task in done:
+                if not task.cancelled() and task.exception() is not None:
+                    raise task.exception()
+        finally:
+            self._stop.set()
+            for task in stages:
+                task.cancel()
+            # The capture thread winds down on its own once _stop is set; retrieve whatever it ends with
+            capture.add_done_callback(lambda future: future.cancelled() or future.exception())
@@ -0,0 +1,82 @@
+import asyncio
+import itertools
+import time
+from collections import deque
+from typing import List
+
+from config import BROADCAST_BUFFER_SIZE
+
+
+class Subscriber:
+    """One client's bounded ring buffer; when full the oldest message is dropped"""
+
+    def __init__(self, name: str, max_pending: int = BROADCAST_BUFFER_SIZE):
+        self.name = name
+        self._pending = deque(maxlen=max_pending)
+        self._ready = asyncio.Event()
+        self.sent = 0
+        self.dropped = 0
+        self.last_lag_ms = 0.0
+        self.max_lag_ms = 0.0
+
+    def push(self, message: str):
+        if len(self._pending) == self._pending.maxlen:
+            self.dropped += 1
+        self._pending.append((message, time.monotonic()))
+        self._ready.set()
+
+    async def next_batch(self) -> List[str]:
+        """Wait for messages, then take everything pending at once"""
+        await self._ready.wait()
+        self._ready.clear()
+        batch = list(self._pending)
+        self._pending.clear()
+        if batch:
+            # Lag of the oldest message in the batch, i.e. how far behind this client is
+            self.last_lag_ms = (time.monotonic() - batch[0][1]) * 1000
+            self.max_lag_ms = max(self.max_lag_ms, self.last_lag_ms)
+        self.sent += len(batch)
+        return [message for message, _ in batch]
+
+    def stats(self) -> dict:
+        oldest = self._pending[0][1] if self._pending else None
+        return {
+            "pending": len(self._pending),
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "lag_ms": (time.monotonic() - oldest) * 1000 if oldest is not None else 0.0,
+            "last_lag_ms": self.last_lag_ms,
+            "max_lag_ms": self.max_lag_ms,
+        }
+
+
+class Broadcaster:
+    """Fan-out pub/sub: every subscriber sees every message, and never blocks the publisher"""
+
+    def __init__(self, max_pending: int = BROADCAST_BUFFER_SIZE):
+        self.max_pending = max_pending
+        self._subscribers = {}
+        self._ids = itertools.count(1)
+        self.published = 0
+
+    def subscribe(self, name: str = "") -> Subscriber:
+        subscriber = Subscriber(f"{next(self._ids)}:{name}", self.max_pending)
+        self._subscribers[subscriber.name] = subscriber
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        self._subscribers.pop(subscriber.name, None)
+
+    def publish_nowait(self, message: str):
+        self.published += 1
+        for subscriber in list(self._subscribers.values()):
+            subscriber.push(message)
+
+    async def publish(self, message: str):
+        self.publish_nowait(message)
+
+    def stats(self) -> dict:
+        return {
+            "published": self.published,
+            "subscribers": {name: sub.stats() for name, sub in self._subscribers.items()},
+        }
@@ -0,0 +1,242 @@
+import asyncio
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, Optional
+
+import speech_recognition as sr
+
+from config import (CONVERSATION_CHUNK_SECONDS, CONVERSATION_CHUNK_OVERLAP, CONVERSATION_JOB_RETENTION,
+                    CONVERSATION_SHUTDOWN_GRACE)
+from features.audio_pipeline import AudioSource, make_audio_source
+from features.metrics import span
+from features.speech_backends import get_speech_backend
+from features.summarizer import StubBackend
+
+# Words compared when stitching overlapping chunk transcripts together
+MAX_OVERLAP_WORDS = 12
+
+
+def _normalize_word(word: str) -> str:
+    return word.lower().strip(".,!?;:\"'")
+
+
+def merge_overlap(previous: str, current: str, max_words: int = MAX_OVERLAP_WORDS) -> str:
+    """Drop the words at the start of current that repeat the end of previous"""
+    previous_words = [_normalize_word(w) for w in previous.split()]
+    current_words = current.split()
+    normalized = [_normalize_word(w) for w in current_words]
+    for n in range(min(max_words, len(previous_words), len(current_words)), 0, -1):
+        if previous_words[-n:] == normalized[:n]:
+            return " ".join(current_words[n:])
+    return current
+
+
+class ConversationJob:
+    """State of one background recording, readable while it is still running"""
+
+    def __init__(self, person: str, duration: float):
+        self.id = uuid.uuid4().hex
+        self.person = person
+        self.duration = duration
+        self.status = "recording"
+        self.chunks: Dict[int, str] = {}
+        self.chunks_total = 0
+        self.summary: Optional[str] = None
+        self.conversation_id: Optional[int] = None
+        self.error: Optional[str] = None
+        self.started_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.version = 0
+        self._changed = asyncio.Condition()
+
+    @property
+    def transcript(self) -> str:
+        """Stitched text of the chunks transcribed so far, in recording order"""
+        text = ""
+        for index in range(self.chunks_total):
+            if index not in self.chunks:
+                break  # later chunks wait until the gap before them is filled
+            chunk = self.chunks[index]
+            text = f"{text} {merge_overlap(text, chunk)}".strip() if text else chunk
+        return text
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "failed")
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "person": self.person,
+            "status": self.status,
+            "duration": self.duration,
+            "chunks_done": len(self.chunks),
+            "chunks_total": self.chunks_total,
+            "transcript": self.transcript,
+            "summary": self.summary,
+            "conversation_id": self.conversation_id,
+            "error": self.error,
+        }
+
+    async def changed(self):
+        async with self._changed:
+            self.version += 1
+            self._changed.notify_all()
+
+    async def wait_for_change(self, seen_version: int, timeout: float) -> bool:
+        """Wait until version moves past seen_version; False on timeout"""
+        async with self._changed:
+            try:
+                await asyncio.wait_for(self._changed.wait_for(lambda: self.version > seen_version), timeout)
+                return True
+            except asyncio.TimeoutError:
+                return False
+
+
+class ConversationJobManager:
+    """Runs conversation recordings in the background, transcribing overlapping chunks as they fill"""
+
+    def __init__(self, summarize: Callable[[str], Awaitable[str]],
+                 save: Callable[[ConversationJob], Awaitable[int]],
+                 source_factory: Callable[[], AudioSource] = make_audio_source,
+                 chunk_seconds: float = CONVERSATION_CHUNK_SECONDS,
+                 overlap_seconds: float = CONVERSATION_CHUNK_OVERLAP):
+        self.summarize = summarize
+        self.save = save
+        self.source_factory = source_factory
+        self.chunk_seconds = chunk_seconds
+        self.overlap_seconds = overlap_seconds
+        self.jobs: Dict[str, ConversationJob] = {}
+        self._tasks = set()
+        self._closing = False
+
+    def start(self, person: str, duration: float) -> ConversationJob:
+        self._prune()
+        job = ConversationJob(person, duration)
+        self.jobs[job.id] = job
+        task = asyncio.create_task(self._run(job))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    def get(self, job_id: str) -> Optional[ConversationJob]:
+        return self.jobs.get(job_id)
+
+    async def shutdown(self, grace: float = CONVERSATION_SHUTDOWN_GRACE):
+        # Recording threads can't be cancelled, so tell them to stop reading,
+        # then give each job a chance to transcribe and save what it has
+        self._closing = True
+        tasks = list(self._tasks)
+        if not tasks:
+            return
+        _, pending = await asyncio.wait(tasks, timeout=grace)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _prune(self):
+        cutoff = time.time() - CONVERSATION_JOB_RETENTION
+        for job_id, job in list(self.jobs.items()):
+            if job.finished and job.finished_at < cutoff:
+                del self.jobs[job_id]
+
+    # Runs on a worker thread
+    def _record(self, job: ConversationJob, loop: asyncio.AbstractEventLoop, transcriptions: list):
+        source = self.source_factory()
+        source.open()
+        try:
+            bytes_per_second = source.sample_rate * source.sample_width
+            window = int(self.chunk_seconds * bytes_per_second)
+            overlap = int(self.overlap_seconds * bytes_per_second)
+            total = int(job.duration * bytes_per_second)
+            # Only the tail of the previous window plus the audio since it; never the whole recording
+            audio = bytearray()
+            fresh = 0
+            recorded = 0
+
+            while recorded < total and not self._closing:
+                chunk = source.read()
+                if chunk is None:
+                    break
+                audio += chunk
+                fresh += len(chunk)
+                recorded += len(chunk)
+                if fresh >= window:
+                    # Hand the window over and keep recording while it is transcribed
+                    transcriptions.append(asyncio.run_coroutine_threadsafe(
+                        self._transcribe(job, job.chunks_total, bytes(audio), source), loop))
+                    job.chunks_total += 1
+                    del audio[:max(0, len(audio) - overlap)]
+                    fresh = 0
+
+            if fresh:
+                transcriptions.append(asyncio.run_coroutine_threadsafe(
+                    self._transcribe(job, job.chunks_total, bytes(audio), source), loop))
+                job.chunks_total += 1
+        finally:
+            source.close()
+
+    async def _transcribe(self, job: ConversationJob, index: int, pcm: bytes, source: AudioSource):
+        audio = sr.AudioData(pcm, source.sample_rate, source.sample_width)
+        try:
+            with span("conversation_chunk_recognition"):
+                text = await asyncio.to_thread(get_speech_backend().recognize, audio)
+        except sr.RequestError as e:
+            print(f"[Conversation {job.id}] chunk {index} failed: {e}")
+            text = None
+        job.chunks[index] = text or ""
+        await job.changed()
+
+    async def _run(self, job: ConversationJob):
+        loop = asyncio.get_running_loop()
+        transcriptions = []
+        try:
+            await asyncio.to_thread(self._record, job, loop, transcriptions)
+            job.status = "transcribing"
+            await job.changed()
+            await asyncio.gather(*(asyncio.wrap_future(future) for future in transcriptions))
+
+            job.status = "summarizing"
+            await job.changed()
+            summary_error = None
+            if self._closing:
+                # No time to wait on the summary service while shutting down
+                summary_error = "server shutting down"
+                job.summary = StubBackend().generate(job.transcript)
+            else:
+                try:
+                    with span("conversation_summary"):
+                        job.summary = await self.summarize(job.transcript)
+                except Exception as e:
+                    # The transcript is worth keeping even when the summary service is down
+                    summary_error = str(e)
+                    job.summary = StubBackend().generate(job.transcript)
+            job.conversation_id = await self.save(job)
+            job.status = "done"
+            if summary_error is not None:
+                print(f"[Conversation {job.id}] summary failed, saved with an extractive one: {summary_error}")
+                job.error = f"Summary failed: {summary_error}"
+        except asyncio.CancelledError:
+            job.status = "failed"
+            job.error = "cancelled"
+            if job.conversation_id is None and job.transcript:
+                await self._save_partial(job)
+            raise
+        except Exception as e:
+            print(f"[Conversation {job.id}] failed: {str(e)}")
+            job.status = "failed"
+            job.error = str(e)
+        finally:
+            job.finished_at = time.time()
+            await job.changed()
+
+    async def _save_partial(self, job: ConversationJob):
+        """Keep the chunks transcribed before a cancel, with an extractive summary"""
+        try:
+            job.summary = job.summary or StubBackend().generate(job.transcript)
+            job.conversation_id = await self.save(job)
+            job.status = "done"
+            job.error = "cancelled; saved the partial transcript"
+            print(f"[Conversation {job.id}] cancelled, saved {len(job.chunks)} of {job.chunks_total} chunks")
+        except Exception as e:
+            print(f"[Conversation {job.id}] cancelled, could not save the partial transcript: {str(e)}")
@@ -0,0 +1,311 @@
+import asyncio
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Optional
+
+from config import (DEVICE_RATE_LIMIT, DEVICE_BURST, DEVICE_SESSION_TTL, DEVICE_RESULT_QUEUE_SIZE,
+                    DEVICE_QUEUE_SIZE, DEVICE_MAX_SESSIONS, DEVICE_TOKENS, INFERENCE_WORKERS,
+                    INFERENCE_QUEUE_SIZE, TARGET_LANG)
+from features.inference_pool import PoolSaturated
+from features.metrics import observe_stage
+
+# Window for the per-device frames-per-second figure, and latencies kept for percentiles
+THROUGHPUT_WINDOW = 60.0
+LATENCY_SAMPLES = 256
+
+
+class UnknownDevice(Exception):
+    """The request's device token is missing, unknown, or belongs to another device."""
+
+
+class TooManyDevices(Exception):
+    """DEVICE_MAX_SESSIONS sessions are live and none has expired."""
+
+
+class DeviceBusy(PoolSaturated):
+    """The device already has DEVICE_QUEUE_SIZE frames waiting, or INFERENCE_QUEUE_SIZE are waiting overall."""
+
+
+def parse_tokens(spec: str) -> Dict[str, str]:
+    """Parse DEVICE_TOKENS ("token=device,token=device") into {token: device}"""
+    tokens = {}
+    for entry in spec.split(","):
+        token, _, device = entry.strip().partition("=")
+        if token and device:
+            tokens[token] = device
+    return tokens
+
+
+class TokenBucket:
+    """Allows `rate` events per second on average and bursts of up to `burst`; rate 0 allows everything"""
+
+    def __init__(self, rate: float = DEVICE_RATE_LIMIT, burst: int = DEVICE_BURST):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self) -> bool:
+        if not self.rate:
+            return True
+        self._refill()
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+    def retry_after(self) -> float:
+        """Seconds until the next event would be allowed"""
+        if not self.rate:
+            return 0.0
+        self._refill()
+        return max(0.0, (1 - self.tokens) / self.rate)
+
+
+class DeviceSession:
+    """Settings, rate limit, recent results and counters of one pair of glasses"""
+
+    def __init__(self, device_id: str, target_lang: str = TARGET_LANG, weight: float = 1.0):
+        self.device_id = device_id
+        self.mode: Optional[str] = None
+        self.target_lang = target_lang
+        # Share of inference capacity relative to other waiting devices
+        self.weight = weight
+        self.bucket = TokenBucket()
+        self.results: Deque[dict] = deque(maxlen=DEVICE_RESULT_QUEUE_SIZE)
+        self.last_seen = time.monotonic()
+        self.frames = 0
+        self.completed = 0
+        self.rate_limited = 0
+        self.failures: Dict[str, int] = {}
+        self._finished: Deque[float] = deque()
+        self._latencies: Deque[float] = deque(maxlen=LATENCY_SAMPLES)
+
+    def admit(self, mode: str) -> bool:
+        """Count an incoming frame and check it against the rate limit"""
+        self.last_seen = time.monotonic()
+        self.mode = mode
+        self.frames += 1
+        if self.bucket.take():
+            return True
+        self.rate_limited += 1
+        return False
+
+    def record_result(self, mode: str, result: dict, seconds: float):
+        now = time.monotonic()
+        self.completed += 1
+        self._latencies.append(seconds * 1000)
+        self._finished.append(now)
+        while self._finished and now - self._finished[0] > THROUGHPUT_WINDOW:
+            self._finished.popleft()
+        self.results.append({"mode": mode, "message": result.get("message"), "at": time.time()})
+
+    def record_failure(self, reason: str):
+        self.failures[reason] = self.failures.get(reason, 0) + 1
+
+    def drain_results(self) -> list:
+        """Results since the last drain, oldest first"""
+        results = list(self.results)
+        self.results.clear()
+        return results
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        latencies = sorted(self._latencies)
+        recent = sum(1 for finished in self._finished if now - finished <= THROUGHPUT_WINDOW)
+        window = min(THROUGHPUT_WINDOW, max(now - (self._finished[0] if self._finished else now), 1.0))
+        return {
+            "device": self.device_id,
+            "mode": self.mode,
+            "target_lang": self.target_lang,
+            "weight": self.weight,
+            "frames": self.frames,
+            "completed": self.completed,
+            "rate_limited": self.rate_limited,
+            "failures": dict(self.failures),
+            "results_queued": len(self.results),
+            "throughput_fps": recent / window if recent else 0.0,
+            "p50_ms": latencies[len(latencies) // 2] if latencies else None,
+            "p95_ms": latencies[int(len(latencies) * 0.95)] if latencies else None,
+            "idle_seconds": now - self.last_seen,
+        }
+
+
+class SessionManager:
+    """Device sessions keyed by X-Device-Id or a device token; idle sessions expire after DEVICE_SESSION_TTL"""
+
+    def __init__(self, tokens: str = DEVICE_TOKENS, ttl: float = DEVICE_SESSION_TTL,
+                 max_sessions: int = DEVICE_MAX_SESSIONS):
+        self.tokens = parse_tokens(tokens)
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self._sessions: Dict[str, DeviceSession] = {}
+        self._last_prune = time.monotonic()
+        self.refused = 0
+
+    def identify(self, connection) -> DeviceSession:
+        """Session for an HTTP request or WebSocket: token first, then X-Device-Id, then the client address.
+
+        Once DEVICE_TOKENS is set every device must present its token; otherwise
+        anyone could claim a token-mapped name through X-Device-Id.
+        """
+        token = connection.headers.get("X-Device-Token") or connection.query_params.get("token")
+        if token:
+            device = self.tokens.get(token)
+            if device is None:
+                raise UnknownDevice("Unknown device token")
+        elif self.tokens:
+            raise UnknownDevice("Device token required")
+        else:
+            device = (connection.headers.get("X-Device-Id") or connection.query_params.get("device_id")
+                      or connection.client.host)
+        return self.get(device)
+
+    def authorize(self, connection, device_id: str) -> DeviceSession:
+        """Session of device_id, only if the connection identifies as that device"""
+        session = self.identify(connection)
+        if session.device_id != device_id:
+            raise UnknownDevice(f"Not authorized for device {device_id}")
+        return session
+
+    def get(self, device_id: str) -> DeviceSession:
+        self._prune()
+        session = self._sessions.get(device_id)
+        if session is None:
+            if len(self._sessions) >= self.max_sessions:
+                self._prune(force=True)
+            if len(self._sessions) >= self.max_sessions:
+                self.refused += 1
+                raise TooManyDevices(f"{len(self._sessions)} device sessions already open")
+            session = self._sessions[device_id] = DeviceSession(device_id)
+            print(f"[Devices] New session {device_id}")
+        return session
+
+    def find(self, device_id: str) -> Optional[DeviceSession]:
+        return self._sessions.get(device_id)
+
+    def _prune(self, force: bool = False):
+        now = time.monotonic()
+        if not self.ttl or (not force and now - self._last_prune < min(self.ttl, 60)):
+            return
+        self._last_prune = now
+        for device_id, session in list(self._sessions.items()):
+            if now - session.last_seen > self.ttl:
+                del self._sessions[device_id]
+                print(f"[Devices] Session {device_id} expired")
+
+    def stats(self) -> list:
+        return [session.stats() for session in self._sessions.values()]
+
+
+class FairScheduler:
+    """Shares `capacity` concurrent jobs across devices by smooth weighted round-robin.
+
+    A job starts right away while there is spare capacity and nobody is waiting.
+    Otherwise it queues behind its own device, and each freed slot goes to the
+    waiting device with the most accumulated credit, so a device sending many
+    frames only gets ahead of the others in proportion to its weight.
+    """
+
+    def __init__(self, capacity: int = INFERENCE_WORKERS, max_waiting: int = DEVICE_QUEUE_SIZE,
+                 max_total: int = INFERENCE_QUEUE_SIZE):
+        self.capacity = capacity
+        self.max_waiting = max_waiting
+        # Bounds the waiting frames across all devices, however many device ids show up
+        self.max_total = max_total
+        self._running = 0
+        self._queues: Dict[str, Deque[asyncio.Future]] = {}
+        self._weights: Dict[str, float] = {}
+        self._credit: Dict[str, float] = {}
+        self.rejected = 0
+
+    async def run(self, device: str, weight: float, job: Callable[[], Awaitable[dict]]) -> dict:
+        if self._running < self.capacity and not self._queues:
+            self._running += 1
+        else:
+            queued_here = len(self._queues.get(device, ()))
+            if queued_here >= self.max_waiting:
+                self.rejected += 1
+                raise DeviceBusy(f"{queued_here} frames from {device} already waiting")
+            waiting = self._waiting()
+            if waiting >= self.max_total:
+                self.rejected += 1
+                raise DeviceBusy(f"{waiting} frames already waiting")
+            queue = self._queues.setdefault(device, deque())
+            turn = asyncio.get_running_loop().create_future()
+            queue.append(turn)
+            self._weights[device] = weight
+            queued = time.perf_counter()
+            try:
+                await turn
+            except asyncio.CancelledError:
+                if turn.cancelled():
+                    self._forget(device, turn)
+                else:
+                    # The slot was handed to us just as we were cancelled; pass it on
+                    self._release()
+                raise
+            observe_stage("fair_wait", time.perf_counter() - queued)
+
+        try:
+            return await job()
+        finally:
+            self._release()
+
+    def _waiting(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+    def _forget(self, device: str, turn: asyncio.Future):
+        queue = self._queues.get(device)
+        if queue is not None and turn in queue:
+            queue.remove(turn)
+            if not queue:
+                self._drop(device)
+
+    def _drop(self, device: str):
+        del self._queues[device]
+        self._weights.pop(device, None)
+        self._credit.pop(device, None)
+
+    def _pick(self) -> Optional[str]:
+        # nginx-style smooth WRR: every waiting device earns its weight, the richest one pays the total
+        best, total = None, 0.0
+        for device in self._queues:
+            weight = self._weights.get(device, 1.0)
+            self._credit[device] = self._credit.get(device, 0.0) + weight
+            total += weight
+            if best is None or self._credit[device] > self._credit[best]:
+                best = device
+        if best is not None:
+            self._credit[best] -= total
+        return best
+
+    def _release(self):
+        while True:
+            device = self._pick()
+            if device is None:
+                self._running -= 1
+                return
+            queue = self._queues[device]
+            turn = queue.popleft()
+            if not queue:
+                self._drop(device)
+            # A cancelled waiter may not have removed itself yet
+            if not turn.done():
+                # The slot moves straight to the waiting job, so _running stays the same
+                turn.set_result(None)
+                return
+
+    def stats(self) -> dict:
+        return {
+            "capacity": self.capacity,
+            "running": self._running,
+            "max_waiting": self.max_total,
+            "waiting": {device: len(queue) for device, queue in self._queues.items()},
+            "rejected": self.rejected,
+        }
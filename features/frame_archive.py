@@ -0,0 +1,132 @@
+import os
+import queue
+import threading
+from collections import deque
+from datetime import datetime
+
+import cv2
+
+from config import (ARCHIVE_DIR, ARCHIVE_EVERY_N, ARCHIVE_QUEUE_SIZE, ARCHIVE_MAX_FILES,
+                    ARCHIVE_MAX_BYTES, JPEG_QUALITY)
+from features.image_encoding import Frame
+from features.metrics import span
+
+_STOP = object()
+
+
+class FrameArchiver:
+    """Writes a sample of frames to disk on a background thread, dropping when it falls behind"""
+
+    def __init__(self, directory: str = ARCHIVE_DIR, every_n: int = ARCHIVE_EVERY_N,
+                 max_queue: int = ARCHIVE_QUEUE_SIZE, max_files: int = ARCHIVE_MAX_FILES,
+                 max_bytes: int = ARCHIVE_MAX_BYTES):
+        self.directory = directory
+        self.every_n = every_n
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self._seen = 0
+        self._seq = 0
+        # (path, size) oldest first, for rotation
+        self._files = deque()
+        self._bytes = 0
+        self.written = 0
+        self.dropped = 0
+        self.errors = 0
+
+    def start(self):
+        if self.every_n <= 0 or self._thread is not None:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        self._load_existing()
+        self._thread = threading.Thread(target=self._run, name="frame-archiver", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5):
+        if self._thread is None:
+            return
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            pass
+        self._thread.join(timeout)
+        self._thread = None
+
+    def submit(self, frame: Frame, mode: str) -> bool:
+        """Queue a frame for archiving if it is sampled; never blocks the caller"""
+        if self._thread is None:
+            return False
+        self._seen += 1
+        if self._seen % self.every_n:
+            return False
+        try:
+            self._queue.put_nowait((frame, mode, datetime.now()))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "dropped": self.dropped,
+            "errors": self.errors,
+            "files": len(self._files),
+            "bytes": self._bytes,
+        }
+
+    # ---------- Worker thread ----------
+    def _load_existing(self):
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and entry.name.endswith(".jpg"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, entry.path, stat.st_size))
+        for _, path, size in sorted(entries):
+            self._files.append((path, size))
+            self._bytes += size
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            try:
+                with span("archive_write"):
+                    self._write(*item)
+            except Exception as e:
+                self.errors += 1
+                print(f"Error archiving frame: {str(e)}")
+
+    def _write(self, frame: Frame, mode: str, captured_at: datetime):
+        if isinstance(frame, (bytes, bytearray)):
+            data = bytes(frame)
+        else:
+            ok, encoded = cv2.imencode(".jpg", cv2.cvtColor(frame, cv2.COLOR_RGB2BGR),
+                                       [cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY])
+            if not ok:
+                raise ValueError("JPEG encoding failed")
+            data = encoded.tobytes()
+
+        # Microsecond timestamp plus a sequence number keeps names unique
+        self._seq += 1
+        name = f"{mode}_{captured_at.strftime('%Y%m%d_%H%M%S_%f')}_{self._seq:06d}.jpg"
+        path = os.path.join(self.directory, name)
+        with open(path, "wb") as f:
+            f.write(data)
+
+        self._files.append((path, len(data)))
+        self._bytes += len(data)
+        self.written += 1
+        self._rotate()
+
+    def _rotate(self):
+        while self._files and (len(self._files) > self.max_files or self._bytes > self.max_bytes):
+            path, size = self._files.popleft()
+            self._bytes -= size
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
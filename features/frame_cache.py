@@ -0,0 +1,81 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+import cv2
+import numpy as np
+
+from config import FRAME_CACHE_SIZE, FRAME_CACHE_TTL, FRAME_CACHE_MAX_DISTANCE
+
+
+def dhash(image) -> int:
+    """64-bit difference hash of an RGB or grayscale frame, or of JPEG bytes"""
+    if isinstance(image, (bytes, bytearray)):
+        # libjpeg can decode straight to 1/8 scale grayscale, far cheaper than a full decode
+        image = cv2.imdecode(np.frombuffer(image, dtype=np.uint8), cv2.IMREAD_REDUCED_GRAYSCALE_8)
+        if image is None:
+            raise ValueError("Could not decode JPEG frame")
+    # Subsample before averaging down; the hash only sees a 9x8 thumbnail anyway
+    small = cv2.resize(image[::4, ::4], (9, 8), interpolation=cv2.INTER_AREA)
+    if small.ndim == 3:
+        small = cv2.cvtColor(small, cv2.COLOR_RGB2GRAY)
+    bits = small[:, 1:] > small[:, :-1]
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+class FrameCache:
+    """LRU of recent frame results, matched by Hamming distance between frame hashes"""
+
+    def __init__(self, max_entries: int = FRAME_CACHE_SIZE, ttl: float = FRAME_CACHE_TTL,
+                 max_distance: int = FRAME_CACHE_MAX_DISTANCE):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_distance = max_distance
+        # (mode, dest_lang, frame_hash) -> (result, expires_at)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, frame_hash: int, mode: str, dest_lang: Optional[str] = None) -> Optional[str]:
+        if self.max_entries <= 0:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            match = None
+            # Newest first: the frame we just answered is the likeliest match
+            for key, (result, expires_at) in reversed(list(self._entries.items())):
+                if expires_at < now:
+                    del self._entries[key]
+                    continue
+                if key[0] != mode or key[1] != dest_lang:
+                    continue
+                if (key[2] ^ frame_hash).bit_count() <= self.max_distance:
+                    match = key
+                    break
+            if match is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(match)
+            self.hits += 1
+            return self._entries[match][0]
+
+    def put(self, frame_hash: int, mode: str, dest_lang: Optional[str], result: str):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            key = (mode, dest_lang, frame_hash)
+            self._entries[key] = (result, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,57 @@
+import struct
+from dataclasses import dataclass
+from typing import Iterator, Tuple
+
+# Binary frame header used on the /frames WebSocket, little-endian like the ESP32:
+#   magic   2s  b"EF"
+#   version B   1
+#   mode    B   0 = translate, 1 = sign_language
+#   format  B   0 = rgb565, 1 = jpeg
+#   flags   B   reserved, 0
+#   width   H
+#   height  H
+#   seq     I   echoed back with the result
+#   length  I   payload bytes following the header
+HEADER = struct.Struct("<2sBBBBHHII")
+MAGIC = b"EF"
+VERSION = 1
+
+MODES = ("translate", "sign_language")
+FORMATS = ("rgb565", "jpeg")
+
+
+@dataclass
+class FrameHeader:
+    mode: str
+    img_format: str
+    width: int
+    height: int
+    seq: int
+
+
+def encode_frame(mode: str, img_format: str, width: int, height: int, seq: int, payload: bytes) -> bytes:
+    """Header plus payload, as the device sends it"""
+    return HEADER.pack(MAGIC, VERSION, MODES.index(mode), FORMATS.index(img_format), 0,
+                       width, height, seq, len(payload)) + payload
+
+
+def iter_frames(message: bytes) -> Iterator[Tuple[FrameHeader, memoryview]]:
+    """Split one WebSocket message into (header, payload) pairs; a message may carry several frames.
+
+    Raises ValueError at the first malformed header, after yielding the frames before it.
+    """
+    view = memoryview(message)
+    offset = 0
+    while offset < len(view):
+        if len(view) - offset < HEADER.size:
+            raise ValueError(f"Truncated frame header at byte {offset}")
+        magic, version, mode, img_format, _, width, height, seq, length = HEADER.unpack_from(view, offset)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"Unknown frame header (magic {magic!r}, version {version})")
+        if mode >= len(MODES) or img_format >= len(FORMATS):
+            raise ValueError(f"Unknown mode {mode} or format {img_format} in frame {seq}")
+        offset += HEADER.size
+        if len(view) - offset < length:
+            raise ValueError(f"Frame {seq} declares {length} bytes but only {len(view) - offset} follow")
+        yield FrameHeader(MODES[mode], FORMATS[img_format], width, height, seq), view[offset:offset + length]
+        offset += length
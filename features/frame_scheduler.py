@@ -0,0 +1,109 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, Tuple
+
+from config import FRAME_RESULT_MAX_AGE
+from features.metrics import FRAME_DROPS, observe_stage
+
+
+class FrameDropped(Exception):
+    """The frame was not answered because a fresher one made it pointless."""
+
+
+class Superseded(FrameDropped):
+    """A newer frame from the same device and mode arrived before this one started."""
+
+
+class StaleResult(FrameDropped):
+    """The answer took longer than FRAME_RESULT_MAX_AGE to produce."""
+
+
+class _Slot:
+    __slots__ = ("running", "pending")
+
+    def __init__(self):
+        self.running = False
+        # Future resolved when the waiting frame may start; at most one per slot
+        self.pending = None
+
+
+class FrameScheduler:
+    """Latest-frame-wins: per (device, mode) at most one frame runs and one waits.
+
+    A frame that arrives while another is waiting replaces it, and the replaced
+    caller gets Superseded. Running jobs are never interrupted (they sit in a
+    worker thread), but a result older than max_result_age is reported as
+    StaleResult instead of being shown.
+    """
+
+    def __init__(self, max_result_age: float = FRAME_RESULT_MAX_AGE):
+        self.max_result_age = max_result_age
+        self._slots: Dict[Tuple[str, str], _Slot] = {}
+        self.completed = 0
+        self.superseded = 0
+        self.stale = 0
+        self.total_age_ms = 0.0
+        self.last_age_ms = 0.0
+
+    async def run(self, device: str, mode: str, job: Callable[[], Awaitable[dict]]) -> dict:
+        received = time.monotonic()
+        key = (device, mode)
+        slot = self._slots.get(key)
+        if slot is None:
+            slot = self._slots[key] = _Slot()
+
+        if slot.running:
+            turn = asyncio.get_running_loop().create_future()
+            if slot.pending is not None and not slot.pending.done():
+                slot.pending.set_exception(Superseded(f"Superseded by a newer {mode} frame"))
+                self.superseded += 1
+                FRAME_DROPS.labels(mode, "superseded").inc()
+            slot.pending = turn
+            try:
+                await turn
+            except asyncio.CancelledError:
+                if slot.pending is turn:
+                    slot.pending = None
+                elif turn.done() and not turn.cancelled() and turn.exception() is None:
+                    # The slot was handed to us just as we were cancelled; pass it on
+                    self._release(key, slot)
+                raise
+        else:
+            slot.running = True
+
+        try:
+            result = await job()
+        finally:
+            self._release(key, slot)
+
+        age = time.monotonic() - received
+        observe_stage("frame_result_age", age)
+        self.last_age_ms = age * 1000
+        self.total_age_ms += self.last_age_ms
+        if self.max_result_age and age > self.max_result_age:
+            self.stale += 1
+            FRAME_DROPS.labels(mode, "stale").inc()
+            raise StaleResult(f"Result was {age:.1f}s old")
+        self.completed += 1
+        return result
+
+    def _release(self, key: Tuple[str, str], slot: _Slot):
+        turn, slot.pending = slot.pending, None
+        if turn is not None and not turn.done():
+            # Ownership moves to the waiting frame, so the slot stays running
+            turn.set_result(None)
+            return
+        slot.running = False
+        del self._slots[key]
+
+    def stats(self) -> dict:
+        answered = self.completed + self.stale
+        return {
+            "active_slots": len(self._slots),
+            "waiting": sum(slot.pending is not None for slot in self._slots.values()),
+            "completed": self.completed,
+            "superseded": self.superseded,
+            "stale": self.stale,
+            "avg_age_ms": self.total_age_ms / answered if answered else 0.0,
+            "last_age_ms": self.last_age_ms,
+        }
@@ -0,0 +1,195 @@
+import asyncio
+import random
+import threading
+import time
+from typing import Optional
+
+import httpx
+
+from config import (GROQ_BASE_URL, GROQ_API_KEY, GROQ_MAX_RETRIES, GROQ_BACKOFF_BASE,
+                    GROQ_BACKOFF_MAX, GROQ_MAX_CONNECTIONS)
+from features.metrics import record_upstream
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class UpstreamError(Exception):
+    """Raised when the chat-completions call fails after all retries."""
+
+
+class GroqClient:
+    """Pooled keep-alive client for the Groq (OpenAI compatible) chat-completions API"""
+
+    def __init__(self, base_url: str = GROQ_BASE_URL, api_key: Optional[str] = GROQ_API_KEY,
+                 max_retries: int = GROQ_MAX_RETRIES, backoff_base: float = GROQ_BACKOFF_BASE,
+                 backoff_max: float = GROQ_BACKOFF_MAX, max_connections: int = GROQ_MAX_CONNECTIONS):
+        if not api_key:
+            raise ValueError("GROQ_API_KEY is not set in the .env file")
+        self.base_url = base_url.rstrip("/")
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._headers = {
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json"
+        }
+        self._limits = httpx.Limits(max_connections=max_connections,
+                                    max_keepalive_connections=max_connections)
+        self._client = None
+        self._async_client = None
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    # ---------- Connection pools ----------
+    @property
+    def client(self) -> httpx.Client:
+        if self._client is None:
+            # Inference threads can get here at the same time; only one of them may build the pool
+            with self._lock:
+                if self._client is None:
+                    self._client = httpx.Client(base_url=self.base_url, headers=self._headers,
+                                                limits=self._limits)
+        return self._client
+
+    @property
+    def async_client(self) -> httpx.AsyncClient:
+        if self._async_client is None:
+            with self._lock:
+                if self._async_client is None:
+                    self._async_client = httpx.AsyncClient(base_url=self.base_url, headers=self._headers,
+                                                           limits=self._limits)
+        return self._async_client
+
+    # ---------- Helpers ----------
+    def _backoff(self, attempt: int, response: Optional[httpx.Response]) -> float:
+        if response is not None and "retry-after" in response.headers:
+            try:
+                return min(float(response.headers["retry-after"]), self.backoff_max)
+            except ValueError:
+                pass
+        # Full jitter so parallel workers don't retry in lockstep
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _record(self, model: str, latency: float, attempts: int, ok: bool):
+        with self._lock:
+            entry = self._stats.setdefault(model, {"calls": 0, "errors": 0, "retries": 0,
+                                                   "total_ms": 0.0, "last_ms": 0.0})
+            entry["calls"] += 1
+            entry["retries"] += attempts - 1
+            entry["errors"] += 0 if ok else 1
+            entry["total_ms"] += latency * 1000
+            entry["last_ms"] = latency * 1000
+        record_upstream("groq", model, ok, latency, attempts)
+        print(f"[Groq] {model} {'ok' if ok else 'failed'} in {latency * 1000:.0f} ms ({attempts} attempt(s))")
+
+    @staticmethod
+    def _payload(model: str, messages: list, max_tokens: int, temperature: float, extra: dict) -> dict:
+        return {"model": model, "messages": messages, "max_tokens": max_tokens,
+                "temperature": temperature, **extra}
+
+    @staticmethod
+    def _content(model: str, response: httpx.Response) -> str:
+        try:
+            return response.json()["choices"][0]["message"]["content"].strip()
+        except (ValueError, KeyError, IndexError, TypeError, AttributeError) as e:
+            raise UpstreamError(f"{model} returned a malformed response: {e!r}") from e
+
+    # ---------- Public API ----------
+    def chat(self, model: str, messages: list, max_tokens: int = 1000, temperature: float = 0.3,
+             timeout: float = 30, **extra) -> str:
+        """Blocking chat completion, returns the message content of the first choice"""
+        payload = self._payload(model, messages, max_tokens, temperature, extra)
+        start = time.perf_counter()
+        for attempt in range(self.max_retries + 1):
+            response = None
+            try:
+                response = self.client.post("/chat/completions", json=payload, timeout=timeout)
+                if response.status_code not in RETRY_STATUS:
+                    response.raise_for_status()
+                    content = self._content(model, response)
+                    self._record(model, time.perf_counter() - start, attempt + 1, True)
+                    return content
+                error = UpstreamError(f"{model} returned HTTP {response.status_code}")
+            except httpx.TransportError as e:
+                error = UpstreamError(f"{model} transport error: {str(e)}")
+            except httpx.HTTPStatusError as e:
+                self._record(model, time.perf_counter() - start, attempt + 1, False)
+                raise UpstreamError(f"{model} returned HTTP {e.response.status_code}") from e
+            except UpstreamError:
+                self._record(model, time.perf_counter() - start, attempt + 1, False)
+                raise
+            if attempt < self.max_retries:
+                time.sleep(self._backoff(attempt, response))
+        self._record(model, time.perf_counter() - start, self.max_retries + 1, False)
+        raise error
+
+    async def achat(self, model: str, messages: list, max_tokens: int = 1000, temperature: float = 0.3,
+                    timeout: float = 30, **extra) -> str:
+        """Async chat completion, returns the message content of the first choice"""
+        payload = self._payload(model, messages, max_tokens, temperature, extra)
+        start = time.perf_counter()
+        for attempt in range(self.max_retries + 1):
+            response = None
+            try:
+                response = await self.async_client.post("/chat/completions", json=payload, timeout=timeout)
+                if response.status_code not in RETRY_STATUS:
+                    response.raise_for_status()
+                    content = self._content(model, response)
+                    self._record(model, time.perf_counter() - start, attempt + 1, True)
+                    return content
+                error = UpstreamError(f"{model} returned HTTP {response.status_code}")
+            except httpx.TransportError as e:
+                error = UpstreamError(f"{model} transport error: {str(e)}")
+            except httpx.HTTPStatusError as e:
+                self._record(model, time.perf_counter() - start, attempt + 1, False)
+                raise UpstreamError(f"{model} returned HTTP {e.response.status_code}") from e
+            except UpstreamError:
+                self._record(model, time.perf_counter() - start, attempt + 1, False)
+                raise
+            if attempt < self.max_retries:
+                await asyncio.sleep(self._backoff(attempt, response))
+        self._record(model, time.perf_counter() - start, self.max_retries + 1, False)
+        raise error
+
+    def warm_up(self, timeout: float = 5):
+        """Open a keep-alive connection (DNS + TLS) before the first real call needs one"""
+        try:
+            self.client.get("/models", timeout=timeout)
+        except httpx.HTTPError as e:
+            print(f"[Groq] warm-up request failed: {str(e)}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {model: {**entry, "avg_ms": entry["total_ms"] / entry["calls"]}
+                    for model, entry in self._stats.items()}
+
+    def close(self):
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+    async def aclose(self):
+        self.close()
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> GroqClient:
+    """Process-wide client, created on first use"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = GroqClient()
+    return _client
+
+
+async def close_client():
+    """Release pooled connections, if a client was ever created"""
+    if _client is not None:
+        await _client.aclose()
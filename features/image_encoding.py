@@ -0,0 +1,53 @@
+import base64
+from typing import Union
+
+import cv2
+import numpy as np
+
+from config import IMAGE_MAX_SIDE, JPEG_QUALITY
+from features.metrics import observe_payload, span
+
+# A frame is either a decoded RGB array or JPEG bytes forwarded untouched from the device
+Frame = Union[np.ndarray, bytes]
+
+
+def downscale(image: np.ndarray, max_side: int = IMAGE_MAX_SIDE) -> np.ndarray:
+    """Shrink an image so its longest side is at most max_side, keeping the aspect ratio"""
+    height, width = image.shape[:2]
+    longest = max(height, width)
+    if max_side <= 0 or longest <= max_side:
+        return image
+    scale = max_side / longest
+    size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    return cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+
+
+def encode_jpeg(image_rgb: np.ndarray, max_side: int = IMAGE_MAX_SIDE, quality: int = JPEG_QUALITY) -> bytes:
+    """Downscale and JPEG encode an RGB array"""
+    with span("jpeg_encode"):
+        small = downscale(image_rgb, max_side)
+        # cv2 expects BGR; converting after the resize touches fewer pixels
+        ok, encoded = cv2.imencode(".jpg", cv2.cvtColor(small, cv2.COLOR_RGB2BGR),
+                                   [cv2.IMWRITE_JPEG_QUALITY, quality])
+    if not ok:
+        raise ValueError("JPEG encoding failed")
+    return encoded.tobytes()
+
+
+def encode_image_base64(image: Frame) -> str:
+    """Base64 JPEG for the vision model; JPEG bytes from the device pass straight through"""
+    jpeg = image if isinstance(image, (bytes, bytearray)) else encode_jpeg(image)
+    observe_payload("upstream_jpeg", len(jpeg))
+    with span("base64_encode"):
+        return base64.b64encode(jpeg).decode("utf-8")
+
+
+def is_jpeg(body: bytes) -> bool:
+    return body[:3] == b"\xff\xd8\xff"
+
+
+def jpeg_decodes(body: bytes) -> bool:
+    """True if libjpeg can decode the body; uses the same cheap 1/8 scale grayscale decode as dhash"""
+    with span("jpeg_validate"):
+        image = cv2.imdecode(np.frombuffer(body, dtype=np.uint8), cv2.IMREAD_REDUCED_GRAYSCALE_8)
+    return image is not None
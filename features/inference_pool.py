@@ -0,0 +1,70 @@
+import asyncio
+import contextvars
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from config import INFERENCE_WORKERS, INFERENCE_QUEUE_SIZE
+from features.metrics import observe_stage
+
+
+class PoolSaturated(Exception):
+    """Raised when every worker is busy and the wait queue is full."""
+
+
+class InferencePool:
+    """Bounded thread pool for blocking vision calls, awaited from the event loop"""
+
+    def __init__(self, max_workers: int = INFERENCE_WORKERS, max_queue: int = INFERENCE_QUEUE_SIZE):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="inference")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.rejected = 0
+        self.completed = 0
+
+    def _acquire(self) -> bool:
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                return False
+            self._pending += 1
+            return True
+
+    def _release(self, _future=None):
+        # Runs when the job finishes or is cancelled before it started
+        with self._lock:
+            self._pending -= 1
+            self.completed += 1
+
+    @staticmethod
+    def _call(submitted: float, fn, args, kwargs):
+        observe_stage("inference_wait", time.perf_counter() - submitted)
+        return fn(*args, **kwargs)
+
+    async def run(self, fn, *args, **kwargs):
+        """Run fn(*args, **kwargs) on a worker thread, or raise PoolSaturated right away"""
+        if not self._acquire():
+            raise PoolSaturated(f"{self._pending} inference jobs already pending")
+        # Copy the caller's context so spans inside fn land in this request's timings
+        context = contextvars.copy_context()
+        call = functools.partial(self._call, time.perf_counter(), fn, args, kwargs)
+        future = self._executor.submit(context.run, call)
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def stats(self) -> dict:
+        with self._lock:
+            pending = self._pending
+        return {
+            "workers": self.max_workers,
+            "in_flight": min(pending, self.max_workers),
+            "queued": max(pending - self.max_workers, 0),
+            "rejected": self.rejected,
+            "completed": self.completed,
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
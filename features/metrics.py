@@ -0,0 +1,158 @@
+import time
+from contextvars import ContextVar
+from typing import Callable, Iterable, Optional
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Gauge, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from starlette.responses import Response
+
+from config import SERVER_TIMING_ENABLED
+
+# Latency buckets in seconds, from sub-millisecond decode work up to slow upstream calls
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+BYTE_BUCKETS = (1024, 4096, 16384, 65536, 131072, 262144, 524288, 1048576, 4194304)
+
+STAGE_SECONDS = Histogram("edith_stage_seconds", "Time spent in one processing stage",
+                          ["stage"], buckets=LATENCY_BUCKETS)
+REQUEST_SECONDS = Histogram("edith_http_request_seconds", "HTTP request latency by route",
+                            ["method", "route", "status"], buckets=LATENCY_BUCKETS)
+UPSTREAM_REQUESTS = Counter("edith_upstream_requests_total", "Calls to external services",
+                            ["service", "model", "outcome"])
+UPSTREAM_RETRIES = Counter("edith_upstream_retries_total", "Retried attempts against external services",
+                           ["service", "model"])
+UPSTREAM_SECONDS = Histogram("edith_upstream_seconds", "External call latency including retries",
+                             ["service", "model"], buckets=LATENCY_BUCKETS)
+PAYLOAD_BYTES = Histogram("edith_payload_bytes", "Size of frames and upstream payloads",
+                          ["kind"], buckets=BYTE_BUCKETS)
+QUEUE_DEPTH = Gauge("edith_queue_depth", "Items waiting in an internal queue", ["queue"])
+FRAME_DROPS = Counter("edith_frame_drops_total", "Frames skipped in favour of newer ones, by reason",
+                      ["mode", "reason"])
+FRAME_RESULTS = Counter("edith_frame_results_total", "Answered frames by mode and where the answer came from",
+                        ["mode", "source"])
+
+# Stage timings of the current request, collected for the Server-Timing header
+_request_timings: ContextVar[Optional[dict]] = ContextVar("request_timings", default=None)
+# labels() does a lock and tuple build per call, so keep the children around
+_stage_children = {}
+
+
+def observe_stage(stage: str, seconds: float):
+    child = _stage_children.get(stage)
+    if child is None:
+        child = _stage_children.setdefault(stage, STAGE_SECONDS.labels(stage))
+    child.observe(seconds)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings[stage] = timings.get(stage, 0.0) + seconds
+
+
+class span:
+    """Context manager timing a block into edith_stage_seconds{stage=...}"""
+    __slots__ = ("stage", "_start", "seconds")
+
+    def __init__(self, stage: str):
+        self.stage = stage
+        self.seconds = 0.0
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.seconds = time.perf_counter() - self._start
+        observe_stage(self.stage, self.seconds)
+        return False
+
+    @property
+    def elapsed_ms(self) -> float:
+        return self.seconds * 1000
+
+
+def record_upstream(service: str, model: str, ok: bool, seconds: float, attempts: int = 1):
+    UPSTREAM_REQUESTS.labels(service, model, "ok" if ok else "error").inc()
+    if attempts > 1:
+        UPSTREAM_RETRIES.labels(service, model).inc(attempts - 1)
+    UPSTREAM_SECONDS.labels(service, model).observe(seconds)
+    observe_stage(f"upstream_{service}", seconds)
+
+
+def observe_payload(kind: str, size: int):
+    PAYLOAD_BYTES.labels(kind).observe(size)
+
+
+def track_queue(name: str, depth: Callable[[], float]):
+    """Report depth() as edith_queue_depth{queue=name} at scrape time; a later call replaces it"""
+    QUEUE_DEPTH.labels(name).set_function(depth)
+
+
+class _StatsCollector:
+    """Reads components' stats() dicts at scrape time and reports chosen keys as counters and gauges"""
+
+    def __init__(self):
+        # name -> (stats, counters, gauges, label)
+        self.sources = {}
+
+    def collect(self):
+        for name, (stats, counters, gauges, label) in list(self.sources.items()):
+            values = stats()
+            # With a label, stats() returns {label value: stats dict}, e.g. one entry per client
+            rows = values.items() if label else [(None, values)]
+            labels = [label] if label else []
+            families = [CounterMetricFamily(f"edith_{name}_{key}", f"{key} reported by {name}", labels=labels)
+                        for key in counters]
+            families += [GaugeMetricFamily(f"edith_{name}_{key}", f"{key} reported by {name}", labels=labels)
+                         for key in gauges]
+            for label_value, row in rows:
+                for family, key in zip(families, [*counters, *gauges]):
+                    family.add_metric([label_value] if label else [], row[key])
+            yield from families
+
+
+_stats_collector = _StatsCollector()
+REGISTRY.register(_stats_collector)
+
+
+def track_stats(name: str, stats: Callable[[], dict], counters: Iterable[str] = (),
+                gauges: Iterable[str] = (), label: Optional[str] = None):
+    """Export stats()[key] as edith_<name>_<key> at scrape time; a later call with the same name replaces it"""
+    _stats_collector.sources[name] = (stats, tuple(counters), tuple(gauges), label)
+
+
+def metrics_response() -> Response:
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
+class MetricsMiddleware:
+    """Times every HTTP request by route and, if enabled, adds a Server-Timing header with its stages"""
+
+    def __init__(self, app, server_timing: bool = SERVER_TIMING_ENABLED):
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = {}
+        token = _request_timings.set(timings)
+        start = time.perf_counter()
+        status = [500]
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                if self.server_timing:
+                    timings["total"] = time.perf_counter() - start
+                    header = ", ".join(f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in timings.items())
+                    message["headers"] = list(message.get("headers", [])) + [
+                        (b"server-timing", header.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_timings.reset(token)
+            # The router fills in the matched route; raw paths would explode label cardinality
+            route = getattr(scope.get("route"), "path", "unmatched")
+            REQUEST_SECONDS.labels(scope["method"], route, str(status[0])).observe(time.perf_counter() - start)
@@ -0,0 +1,53 @@
+import threading
+
+import cv2
+import numpy as np
+
+from config import RGB565_BYTE_ORDER
+
+
+def _build_lut() -> np.ndarray:
+    """Precompute the packed RGB888 value for every one of the 65536 RGB565 codes."""
+    codes = np.arange(1 << 16, dtype=np.uint32)
+    r = (codes >> 11) & 0x1F
+    g = (codes >> 5) & 0x3F
+    b = codes & 0x1F
+    # Replicate the high bits into the low bits so full scale maps to 255
+    r = (r << 3) | (r >> 2)
+    g = (g << 2) | (g >> 4)
+    b = (b << 3) | (b >> 2)
+    # Little-endian packing puts the bytes in R, G, B, pad order in memory
+    return (r | (g << 8) | (b << 16)).astype("<u4")
+
+
+RGB565_LUT = _build_lut()
+
+# One scratch buffer per thread, reused while the resolution stays the same. Resolutions come
+# from request headers, so a new one replaces the buffer rather than adding another.
+_scratch = threading.local()
+
+
+def _scratch_buffer(width: int, height: int) -> np.ndarray:
+    buf = getattr(_scratch, "buffer", None)
+    if buf is None or buf.shape != (height, width):
+        buf = _scratch.buffer = np.empty((height, width), dtype="<u4")
+    return buf
+
+
+def decode_rgb565(body: bytes, width: int, height: int,
+                  byte_order: str = RGB565_BYTE_ORDER, out: np.ndarray = None) -> np.ndarray:
+    """Decode a raw RGB565 frame straight into an RGB888 (height, width, 3) array"""
+    expected = width * height * 2
+    if len(body) != expected:
+        raise ValueError(f"Expected {expected} bytes for a {width}x{height} RGB565 frame, got {len(body)}")
+
+    dtype = ">u2" if byte_order == "big" else "<u2"
+    codes = np.frombuffer(body, dtype=dtype).reshape((height, width))
+
+    # One gather through the table, then drop the pad byte
+    packed = _scratch_buffer(width, height)
+    np.take(RGB565_LUT, codes, out=packed)
+    rgba = packed.view(np.uint8).reshape((height, width, 4))
+    if out is None:
+        return cv2.cvtColor(rgba, cv2.COLOR_RGBA2RGB)
+    return cv2.cvtColor(rgba, cv2.COLOR_RGBA2RGB, dst=out)
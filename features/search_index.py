@@ -0,0 +1,174 @@
+import html
+import re
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import text
+
+# SQLite: one FTS5 table over notes and conversations, kept current by insert/delete triggers.
+# MySQL: FULLTEXT indexes declared on the models, which InnoDB maintains on insert.
+FTS_TABLE = "search_fts"
+SNIPPET_WORDS = 16
+HIGHLIGHT_OPEN, HIGHLIGHT_CLOSE = "<mark>", "</mark>"
+# Control characters FTS5 puts around matches, swapped for the tags once the stored text is escaped
+_MATCH_OPEN, _MATCH_CLOSE = "\x02", "\x03"
+
+SQLITE_SETUP = [
+    f"""CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+        body, summary,
+        kind UNINDEXED, row_id UNINDEXED, person UNINDEXED, created_at UNINDEXED,
+        tokenize = 'porter unicode61'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS notes_search_insert AFTER INSERT ON notes BEGIN
+        INSERT INTO {FTS_TABLE} (body, summary, kind, row_id, person, created_at)
+        VALUES (new.note, '', 'note', new.id, NULL, new.created_at);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS notes_search_delete AFTER DELETE ON notes BEGIN
+        DELETE FROM {FTS_TABLE} WHERE kind = 'note' AND row_id = old.id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS conversations_search_insert AFTER INSERT ON conversations BEGIN
+        INSERT INTO {FTS_TABLE} (body, summary, kind, row_id, person, created_at)
+        VALUES (new.conversation, new.summary, 'conversation', new.id, new.person, new.created_at);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS conversations_search_delete AFTER DELETE ON conversations BEGIN
+        DELETE FROM {FTS_TABLE} WHERE kind = 'conversation' AND row_id = old.id;
+    END""",
+]
+
+SQLITE_BACKFILL = [
+    f"""INSERT INTO {FTS_TABLE} (body, summary, kind, row_id, person, created_at)
+        SELECT note, '', 'note', id, NULL, created_at FROM notes""",
+    f"""INSERT INTO {FTS_TABLE} (body, summary, kind, row_id, person, created_at)
+        SELECT conversation, summary, 'conversation', id, person, created_at FROM conversations""",
+]
+
+
+def search_terms(query: str) -> List[str]:
+    return re.findall(r"\w+", query.lower())
+
+
+def create_search_index(conn):
+    """Create the SQLite FTS table and triggers, indexing existing rows the first time (run_sync)"""
+    if conn.dialect.name != "sqlite":
+        # FULLTEXT indexes come from the model definitions / migrations.m003_search_index
+        return
+    exists = conn.execute(text("SELECT 1 FROM sqlite_master WHERE name = :name"), {"name": FTS_TABLE}).first()
+    if exists:
+        return
+    for statement in SQLITE_SETUP:
+        conn.execute(text(statement))
+    for statement in SQLITE_BACKFILL:
+        conn.execute(text(statement))
+    print(f"[Search] Built {FTS_TABLE}")
+
+
+def highlight_snippet(body: Optional[str], terms: List[str], words: int = SNIPPET_WORDS) -> str:
+    """Window of HTML-escaped text around the first matching word, with matches wrapped in <mark>"""
+    tokens = (body or "").split()
+    if not tokens:
+        return ""
+
+    def matches(token):
+        word = re.sub(r"\W+", "", token.lower())
+        return any(word.startswith(term) for term in terms)
+
+    first = next((i for i, token in enumerate(tokens) if matches(token)), 0)
+    start = max(0, first - words // 4)
+    window = tokens[start:start + words]
+    marked = [f"{HIGHLIGHT_OPEN}{html.escape(token)}{HIGHLIGHT_CLOSE}" if matches(token) else html.escape(token)
+              for token in window]
+    prefix = "…" if start > 0 else ""
+    suffix = "…" if start + words < len(tokens) else ""
+    return prefix + " ".join(marked) + suffix
+
+
+def _sqlite_query(terms, kind, person, since, until, limit):
+    # Quote every term so user input can never be parsed as FTS5 syntax; all terms must match,
+    # as prefixes like the MySQL path's term*
+    match = " ".join(f'"{term}"*' for term in terms)
+    clauses = [f"{FTS_TABLE} MATCH :match"]
+    params = {"match": match, "limit": limit}
+    if kind:
+        clauses.append("kind = :kind")
+        params["kind"] = kind
+    if person:
+        clauses.append("person = :person")
+        params["person"] = person
+    # created_at is stored in SQLAlchemy's SQLite DATETIME format, which sorts as text
+    if since is not None:
+        clauses.append("created_at >= :since")
+        params["since"] = since.isoformat(sep=" ", timespec="microseconds")
+    if until is not None:
+        clauses.append("created_at < :until")
+        params["until"] = until.isoformat(sep=" ", timespec="microseconds")
+    # Column -1 lets FTS5 pick whichever of body/summary matched best for the snippet
+    sql = (
+        f"SELECT kind, row_id AS id, person, created_at, "
+        f"snippet({FTS_TABLE}, -1, '{_MATCH_OPEN}', '{_MATCH_CLOSE}', '…', {SNIPPET_WORDS}) AS snippet, "
+        f"-bm25({FTS_TABLE}, 1.0, 2.0) AS score "
+        f"FROM {FTS_TABLE} WHERE {' AND '.join(clauses)} ORDER BY bm25({FTS_TABLE}, 1.0, 2.0) LIMIT :limit"
+    )
+    return text(sql), params
+
+
+def _mysql_query(terms, kind, person, since, until, limit):
+    params = {"match": " ".join(f"+{term}*" for term in terms), "limit": limit}
+    filters = ""
+    if since is not None:
+        filters += " AND created_at >= :since"
+        params["since"] = since
+    if until is not None:
+        filters += " AND created_at < :until"
+        params["until"] = until
+
+    selects = []
+    # Notes have no person, so a person filter limits results to conversations
+    if kind in (None, "note") and not person:
+        selects.append(
+            "SELECT 'note' AS kind, id, NULL AS person, created_at, note AS body, NULL AS summary, "
+            "MATCH(note) AGAINST (:match IN BOOLEAN MODE) AS score "
+            f"FROM notes WHERE MATCH(note) AGAINST (:match IN BOOLEAN MODE){filters}"
+        )
+    if kind in (None, "conversation"):
+        person_filter = ""
+        if person:
+            person_filter = " AND person = :person"
+            params["person"] = person
+        selects.append(
+            "SELECT 'conversation' AS kind, id, person, created_at, conversation AS body, summary, "
+            "MATCH(conversation, summary) AGAINST (:match IN BOOLEAN MODE) AS score "
+            "FROM conversations WHERE MATCH(conversation, summary) AGAINST (:match IN BOOLEAN MODE)"
+            f"{filters}{person_filter}"
+        )
+    sql = " UNION ALL ".join(f"({select})" for select in selects) + " ORDER BY score DESC LIMIT :limit"
+    return text(sql), params
+
+
+async def search(db, query: str, kind: Optional[str] = None, person: Optional[str] = None,
+                 since: Optional[datetime] = None, until: Optional[datetime] = None, limit: int = 20) -> List[dict]:
+    """Ranked matches across notes and conversations, best first"""
+    terms = search_terms(query)
+    if not terms:
+        return []
+
+    if db.bind.dialect.name == "sqlite":
+        statement, params = _sqlite_query(terms, kind, person, since, until, limit)
+        rows = (await db.execute(statement, params)).mappings().all()
+        # Stored text is escaped before the highlight tags go in, so a snippet is safe to render as HTML
+        return [{**row, "snippet": html.escape(row["snippet"] or "").replace(_MATCH_OPEN, HIGHLIGHT_OPEN)
+                 .replace(_MATCH_CLOSE, HIGHLIGHT_CLOSE)} for row in rows]
+
+    statement, params = _mysql_query(terms, kind, person, since, until, limit)
+    rows = (await db.execute(statement, params)).mappings().all()
+    results = []
+    for row in rows:
+        body = row["body"] if any(term in (row["body"] or "").lower() for term in terms) else row["summary"]
+        results.append({
+            "kind": row["kind"],
+            "id": row["id"],
+            "person": row["person"],
+            "created_at": row["created_at"],
+            "snippet": highlight_snippet(body, terms),
+            "score": float(row["score"]),
+        })
+    return results
@@ -0,0 +1,132 @@
+import os
+import threading
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+from config import SIGN_MODEL_PATH, SIGN_LABELS_PATH, SIGN_LOCAL_MIN_CONFIDENCE, SIGN_LOCAL_ENABLED
+from features.image_encoding import Frame, downscale
+from features.metrics import span
+from features.sign_language import sign_language_from_image_array
+
+# MediaPipe works well well below camera resolution
+LANDMARK_MAX_SIDE = 320
+
+
+def landmark_features(landmarks) -> np.ndarray:
+    """21 hand landmarks -> 42 translation and scale invariant features"""
+    points = np.array([(lm.x, lm.y) for lm in landmarks], dtype=np.float32)
+    points -= points[0]  # relative to the wrist
+    scale = np.abs(points).max()
+    if scale > 0:
+        points /= scale
+    return points.flatten()
+
+
+class LocalSignClassifier:
+    """MediaPipe Hands landmarks feeding a small TFLite classifier, all on the CPU"""
+
+    def __init__(self, model_path: str = SIGN_MODEL_PATH, labels_path: str = SIGN_LABELS_PATH):
+        import mediapipe as mp
+        import tensorflow as tf
+
+        with open(labels_path) as f:
+            self.labels = [line.strip() for line in f if line.strip()]
+        self._hands = mp.solutions.hands.Hands(static_image_mode=True, max_num_hands=1,
+                                               min_detection_confidence=0.5)
+        self._interpreter = tf.lite.Interpreter(model_path=model_path)
+        self._interpreter.allocate_tensors()
+        self._input = self._interpreter.get_input_details()[0]["index"]
+        self._output = self._interpreter.get_output_details()[0]["index"]
+        # Neither MediaPipe graphs nor TFLite interpreters may be shared across threads concurrently
+        self._lock = threading.Lock()
+
+    def landmarks(self, image_rgb: np.ndarray) -> Optional[np.ndarray]:
+        with self._lock:
+            result = self._hands.process(downscale(image_rgb, LANDMARK_MAX_SIDE))
+        if not result.multi_hand_landmarks:
+            return None
+        return landmark_features(result.multi_hand_landmarks[0].landmark)
+
+    def classify(self, features: np.ndarray) -> Tuple[str, float]:
+        with self._lock:
+            self._interpreter.set_tensor(self._input, features[np.newaxis, :].astype(np.float32))
+            self._interpreter.invoke()
+            probabilities = self._interpreter.get_tensor(self._output)[0]
+        best = int(np.argmax(probabilities))
+        return self.labels[best], float(probabilities[best])
+
+
+_classifier = None
+_classifier_failed = False
+_classifier_lock = threading.Lock()
+
+
+def get_local_classifier() -> Optional[LocalSignClassifier]:
+    """The local classifier, or None when it is disabled or its model can't be loaded"""
+    global _classifier, _classifier_failed
+    if not SIGN_LOCAL_ENABLED or _classifier_failed:
+        return None
+    with _classifier_lock:
+        if _classifier is None and not _classifier_failed:
+            if not os.path.exists(SIGN_MODEL_PATH):
+                print(f"[Sign] No local model at {SIGN_MODEL_PATH}, using the remote model only")
+                _classifier_failed = True
+                return None
+            try:
+                _classifier = LocalSignClassifier()
+            except Exception as e:
+                print(f"[Sign] Local classifier unavailable: {str(e)}")
+                _classifier_failed = True
+        return _classifier
+
+
+def _to_rgb(image: Frame) -> np.ndarray:
+    if isinstance(image, (bytes, bytearray)):
+        bgr = cv2.imdecode(np.frombuffer(image, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if bgr is None:
+            raise ValueError("Could not decode JPEG frame")
+        return cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB)
+    return image
+
+
+def recognize_sign(image: Frame) -> dict:
+    """Local landmark classifier first, remote vision model when it isn't confident.
+
+    Returns the message plus which path answered, the local confidence and
+    per-stage timings in milliseconds.
+    """
+    timings = {}
+    confidence = None
+    classifier = get_local_classifier()
+
+    if classifier is not None:
+        try:
+            with span("sign_decode") as timer:
+                rgb = _to_rgb(image)
+            timings["decode"] = timer.elapsed_ms
+
+            with span("sign_landmarks") as timer:
+                features = classifier.landmarks(rgb)
+            timings["landmarks"] = timer.elapsed_ms
+
+            if features is None:
+                # No hand in view, so there is no sign to interpret
+                return {"message": None, "source": "local", "confidence": 0.0, "timings_ms": timings}
+
+            with span("sign_classify") as timer:
+                label, confidence = classifier.classify(features)
+            timings["classify"] = timer.elapsed_ms
+
+            if confidence >= SIGN_LOCAL_MIN_CONFIDENCE:
+                print(f"[Sign] Local: {label} ({confidence:.2f})")
+                return {"message": label, "source": "local", "confidence": confidence, "timings_ms": timings}
+            print(f"[Sign] Local guess {label} ({confidence:.2f}) below threshold, asking remote model")
+        except Exception as e:
+            print(f"[Sign] Local path failed: {str(e)}")
+
+    with span("sign_remote") as timer:
+        message = sign_language_from_image_array(image)
+    timings["remote"] = timer.elapsed_ms
+    return {"message": message, "source": "remote", "confidence": confidence, "timings_ms": timings}
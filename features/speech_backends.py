@@ -0,0 +1,155 @@
+import json
+import threading
+from typing import Iterable, Iterator, Optional, Tuple
+
+import numpy as np
+import speech_recognition as sr
+
+from config import (SPEECH_BACKEND, SPEECH_LANGUAGE, VOSK_MODEL_PATH, WHISPER_MODEL,
+                    WHISPER_COMPUTE_TYPE)
+
+# Local engines want 16 kHz, 16-bit mono
+LOCAL_SAMPLE_RATE = 16000
+
+
+class SpeechBackend:
+    """Turns speech audio into text.
+
+    recognize() returns None when nothing intelligible was said and raises
+    sr.RequestError when the engine itself is unavailable.
+    """
+    name = "base"
+
+    def recognize(self, audio: sr.AudioData) -> Optional[str]:
+        raise NotImplementedError
+
+    def stream(self, chunks: Iterable[bytes], sample_rate: int) -> Iterator[Tuple[bool, str]]:
+        """Feed 16-bit mono chunks, yielding (is_final, text) hypotheses as they firm up"""
+        audio = sr.AudioData(b"".join(chunks), sample_rate, 2)
+        text = self.recognize(audio)
+        if text:
+            yield True, text
+
+
+class GoogleBackend(SpeechBackend):
+    """The free Google Web Speech API used so far; one network round trip per utterance"""
+    name = "google"
+
+    def __init__(self, language: str = SPEECH_LANGUAGE):
+        self.language = language
+        self._recognizer = sr.Recognizer()
+
+    def recognize(self, audio: sr.AudioData) -> Optional[str]:
+        try:
+            return self._recognizer.recognize_google(audio, language=self.language)
+        except sr.UnknownValueError:
+            return None
+
+
+class VoskBackend(SpeechBackend):
+    """Offline Kaldi recognizer; the model is loaded once and shared by all calls"""
+    name = "vosk"
+
+    def __init__(self, model_path: str = VOSK_MODEL_PATH):
+        try:
+            import vosk
+        except ImportError as e:
+            raise sr.RequestError("vosk is not installed (pip install vosk)") from e
+        vosk.SetLogLevel(-1)
+        self._vosk = vosk
+        self._model = vosk.Model(model_path)
+
+    def _recognizer(self):
+        return self._vosk.KaldiRecognizer(self._model, LOCAL_SAMPLE_RATE)
+
+    def recognize(self, audio: sr.AudioData) -> Optional[str]:
+        recognizer = self._recognizer()
+        recognizer.AcceptWaveform(audio.get_raw_data(convert_rate=LOCAL_SAMPLE_RATE, convert_width=2))
+        text = json.loads(recognizer.FinalResult()).get("text", "")
+        return text or None
+
+    def stream(self, chunks: Iterable[bytes], sample_rate: int) -> Iterator[Tuple[bool, str]]:
+        recognizer = self._vosk.KaldiRecognizer(self._model, sample_rate)
+        for chunk in chunks:
+            if recognizer.AcceptWaveform(chunk):
+                text = json.loads(recognizer.Result()).get("text", "")
+                if text:
+                    yield True, text
+            else:
+                partial = json.loads(recognizer.PartialResult()).get("partial", "")
+                if partial:
+                    yield False, partial
+        text = json.loads(recognizer.FinalResult()).get("text", "")
+        if text:
+            yield True, text
+
+
+class WhisperBackend(SpeechBackend):
+    """Quantized Whisper via faster-whisper, running on the CPU"""
+    name = "whisper"
+
+    # Re-run the decoder over the growing buffer this often while streaming
+    PARTIAL_EVERY_SECONDS = 1.0
+
+    def __init__(self, model_name: str = WHISPER_MODEL, compute_type: str = WHISPER_COMPUTE_TYPE,
+                 language: str = SPEECH_LANGUAGE):
+        try:
+            from faster_whisper import WhisperModel
+        except ImportError as e:
+            raise sr.RequestError("faster-whisper is not installed (pip install faster-whisper)") from e
+        self.language = language.split("-")[0]
+        self._model = WhisperModel(model_name, device="cpu", compute_type=compute_type)
+        # CTranslate2 models are not safe to drive from several threads at once
+        self._lock = threading.Lock()
+
+    def _transcribe(self, pcm: bytes) -> Optional[str]:
+        samples = np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32768.0
+        with self._lock:
+            segments, _ = self._model.transcribe(samples, language=self.language, beam_size=1,
+                                                 vad_filter=False)
+            text = " ".join(segment.text.strip() for segment in segments).strip()
+        return text or None
+
+    def recognize(self, audio: sr.AudioData) -> Optional[str]:
+        return self._transcribe(audio.get_raw_data(convert_rate=LOCAL_SAMPLE_RATE, convert_width=2))
+
+    def stream(self, chunks: Iterable[bytes], sample_rate: int) -> Iterator[Tuple[bool, str]]:
+        buffered = bytearray()
+        since_partial = 0
+        partial_bytes = int(self.PARTIAL_EVERY_SECONDS * sample_rate * 2)
+        for chunk in chunks:
+            buffered += chunk
+            since_partial += len(chunk)
+            if since_partial >= partial_bytes:
+                since_partial = 0
+                text = self.recognize(sr.AudioData(bytes(buffered), sample_rate, 2))
+                if text:
+                    yield False, text
+        text = self.recognize(sr.AudioData(bytes(buffered), sample_rate, 2))
+        if text:
+            yield True, text
+
+
+BACKENDS = {
+    GoogleBackend.name: GoogleBackend,
+    VoskBackend.name: VoskBackend,
+    WhisperBackend.name: WhisperBackend,
+}
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def check_speech_backend(name: str = SPEECH_BACKEND):
+    """Raise ValueError for a SPEECH_BACKEND that names no known engine"""
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown speech backend '{name}', expected one of {', '.join(BACKENDS)}")
+
+
+def get_speech_backend(name: str = SPEECH_BACKEND) -> SpeechBackend:
+    """Backend selected by SPEECH_BACKEND, built once and kept warm for the life of the process"""
+    check_speech_backend(name)
+    with _backends_lock:
+        if name not in _backends:
+            _backends[name] = BACKENDS[name]()
+        return _backends[name]
@@ -0,0 +1,150 @@
+import asyncio
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional
+
+from config import (SUMMARY_BACKEND, GEMINI_API_KEY, SUMMARY_MODEL, SUMMARY_CHUNK_WORDS,
+                    SUMMARY_CONCURRENCY, SUMMARY_CACHE_SIZE)
+from features.metrics import record_upstream
+
+CHUNK_PROMPT = "Summarize this part of a conversation in a few sentences:\n\n{text}"
+SINGLE_PROMPT = "Summarize this conversation:\n\n{text}"
+REDUCE_PROMPT = ("These are summaries of consecutive parts of one conversation. "
+                 "Combine them into a single summary of the whole conversation:\n\n{text}")
+
+
+class SummaryBackend:
+    """Turns a prompt into generated text; called from worker threads"""
+    name = "base"
+
+    def generate(self, prompt: str) -> str:
+        raise NotImplementedError
+
+
+class GeminiBackend(SummaryBackend):
+    """Gemini text model, configured and constructed once and reused for every call"""
+    name = "gemini"
+
+    def __init__(self, model_name: str = SUMMARY_MODEL, api_key: str = GEMINI_API_KEY):
+        import google.generativeai as genai
+        genai.configure(api_key=api_key)
+        self.model = genai.GenerativeModel(model_name)
+
+    def generate(self, prompt: str) -> str:
+        response = self.model.generate_content(prompt)
+        return response.text.strip()
+
+
+class StubBackend(SummaryBackend):
+    """Local extractive stand-in: the first sentence of the prompt body, no network"""
+    name = "stub"
+
+    def __init__(self, max_words: int = 40):
+        self.max_words = max_words
+        self.calls = 0
+
+    def generate(self, prompt: str) -> str:
+        self.calls += 1
+        body = prompt.split("\n\n", 1)[-1]
+        sentence = re.split(r"(?<=[.!?])\s+", body.strip(), maxsplit=1)[0]
+        return " ".join(sentence.split()[:self.max_words])
+
+
+def make_backend(name: str = SUMMARY_BACKEND) -> SummaryBackend:
+    if name == "stub":
+        return StubBackend()
+    if name == "gemini":
+        return GeminiBackend()
+    raise ValueError(f"Unknown summary backend: {name}")
+
+
+# Reduce passes over the partial summaries before giving up and joining them as they are
+MAX_REDUCE_ROUNDS = 3
+
+
+def split_chunks(text: str, chunk_words: int = SUMMARY_CHUNK_WORDS) -> List[str]:
+    """Fixed word-count chunks from the start, so a growing transcript keeps its earlier chunks"""
+    words = text.split()
+    return [" ".join(words[i:i + chunk_words]) for i in range(0, len(words), chunk_words)]
+
+
+class Summarizer:
+    """Map-reduce summarizer: chunks are summarized concurrently, cached by content hash, then combined"""
+
+    def __init__(self, backend: Optional[SummaryBackend] = None, chunk_words: int = SUMMARY_CHUNK_WORDS,
+                 concurrency: int = SUMMARY_CONCURRENCY, cache_size: int = SUMMARY_CACHE_SIZE):
+        self._backend = backend
+        self._backend_lock = threading.Lock()
+        self.chunk_words = chunk_words
+        self.concurrency = concurrency
+        self.cache_size = cache_size
+        # sha256(prompt + text) -> summary
+        self._cache = OrderedDict()
+        self._semaphore = None
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def backend(self) -> SummaryBackend:
+        # Built on first use so importing edith does not need the API key or the SDK
+        with self._backend_lock:
+            if self._backend is None:
+                self._backend = make_backend()
+            return self._backend
+
+    async def _generate(self, template: str, text: str) -> str:
+        key = hashlib.sha256(f"{template}\0{text}".encode("utf-8")).hexdigest()
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return self._cache[key]
+
+        self.misses += 1
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        async with self._semaphore:
+            backend = self.backend
+            start = time.perf_counter()
+            try:
+                summary = await asyncio.to_thread(backend.generate, template.format(text=text))
+            except Exception:
+                record_upstream(backend.name, SUMMARY_MODEL, False, time.perf_counter() - start)
+                raise
+            record_upstream(backend.name, SUMMARY_MODEL, True, time.perf_counter() - start)
+
+        self._cache[key] = summary
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return summary
+
+    async def summarize(self, text: str) -> str:
+        if not text or not text.strip():
+            return "No transcript to summarize."
+
+        chunks = split_chunks(text, self.chunk_words)
+        if len(chunks) == 1:
+            return await self._generate(SINGLE_PROMPT, chunks[0])
+
+        partials = await asyncio.gather(*(self._generate(CHUNK_PROMPT, chunk) for chunk in chunks))
+        # Reduce again if the partial summaries are themselves longer than one chunk
+        for _ in range(MAX_REDUCE_ROUNDS):
+            groups = split_chunks("\n".join(partials), self.chunk_words)
+            if len(groups) == 1:
+                return await self._generate(REDUCE_PROMPT, "\n".join(partials))
+            reduced = await asyncio.gather(*(self._generate(REDUCE_PROMPT, group) for group in groups))
+            if len(reduced) >= len(partials):
+                # The model is not shortening its input (e.g. it echoes it); another round won't help
+                break
+            partials = reduced
+        return "\n".join(partials)
+
+    def stats(self) -> dict:
+        return {
+            "backend": self._backend.name if self._backend is not None else None,
+            "cached": len(self._cache),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
@@ -1,17 +1,44 @@
+import time
+
 import cv2
-import pytesseract
-from googletrans import Translator
+
+from features.metrics import record_upstream
+from features.translation_cache import translation_cache
+
+_translator = None
+
+
+def get_translator():
+    """Shared googletrans Translator so its HTTP session is reused across calls"""
+    global _translator
+    if _translator is None:
+        # Imported on first use; it pulls in its own HTTP stack
+        from googletrans import Translator
+        _translator = Translator()
+    return _translator
 
 
 async def translate_text(text: str, dest_lang: str = 'en') -> str:
     """Translate the given text to the specified language."""
-    translator = Translator()
-    translated = await  translator.translate(text, dest=dest_lang)
+    cached = await translation_cache.aget(text, dest_lang, backend="googletrans")
+    if cached is not None:
+        print(f"[Translation] (cached) {cached}")
+        return cached
+    start = time.perf_counter()
+    try:
+        translated = await get_translator().translate(text, dest=dest_lang)
+    except Exception:
+        record_upstream("googletrans", dest_lang, False, time.perf_counter() - start)
+        raise
+    record_upstream("googletrans", dest_lang, True, time.perf_counter() - start)
     print(f"[Translation] {translated.text}")
+    await translation_cache.aput(text, dest_lang, translated.text, backend="googletrans")
     return translated.text
 
 
 def translate_text_from_image(image_path, dest_lang='en'):
+    import pytesseract
+
     try:
         # Load image
         img = cv2.imread(image_path)
@@ -26,8 +53,7 @@ def translate_text_from_image(image_path, dest_lang='en'):
         print("[OCR] Extracted Text:", extracted_text)
 
         # Translate text
-        translator = Translator()
-        translated = translator.translate(extracted_text, dest=dest_lang)
+        translated = get_translator().translate(extracted_text, dest=dest_lang)
 
         print(f"[Translation] {translated.text}")
         return translated.text
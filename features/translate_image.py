@@ -1,18 +1,14 @@
 import base64
-import numpy as np
-import requests
+import json
 import io
-from PIL import Image
 
-import os
-from dotenv import load_dotenv
-
-load_dotenv()
-GROQ_API_URL = "https://api.groq.com/openai/v1/chat/completions"
-GROQ_API_KEY = os.getenv("GROQ_API_KEY_PRODUCT")
-
-if not GROQ_API_KEY:
-    raise ValueError("GROQ_API_KEY is not set in the .env file")
+from config import (VISION_MODEL, TEXT_MODEL, VISION_TIMEOUT, TEXT_TIMEOUT, IMAGE_TRANSLATE_MODE,
+                    TEXT_GATE_ENABLED)
+from features.groq_client import get_client
+from features.image_encoding import Frame, encode_image_base64
+from features.metrics import span
+from features.text_gate import detect_text, crop_to_text
+from features.translation_cache import translation_cache
 
 
 
@@ -24,7 +20,8 @@ def process_image(image_path: str) -> str:
             if not image_content:
                 raise ValueError("Empty image file")
 
-            # Verify it's a valid image
+            # Verify it's a valid image; PIL is only needed on this legacy path
+            from PIL import Image
             img = Image.open(io.BytesIO(image_content))
             img.verify()
 
@@ -35,90 +32,108 @@ def process_image(image_path: str) -> str:
         raise ValueError(f"Invalid image format: {str(e)}")
 
 
-def translate_text_from_image_array(image_array: np.ndarray, dest_lang: str = 'en') -> str:
-    """Extract text from RGB image array using LLaMA Vision model and translate"""
+def _image_messages(prompt: str, encoded_image: str) -> list:
+    return [{
+        "role": "user",
+        "content": [
+            {"type": "text", "text": prompt},
+            {"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{encoded_image}"}}
+        ]
+    }]
+
+
+def _fused_extract_and_translate(encoded_image: str, dest_lang: str) -> str:
+    """One vision call returning the source text, its language and the translation"""
+    fused_prompt = (
+        "Extract all visible text from the provided image and translate it to "
+        f"the language with ISO 639-1 code '{dest_lang}'. "
+        "Respond with a JSON object with exactly these keys: "
+        '"text" (the extracted text, empty string if there is none), '
+        '"language" (ISO 639-1 code of the extracted text) and '
+        '"translation" (the translated text). No other commentary.'
+    )
+
+    content = get_client().chat(
+        VISION_MODEL,
+        _image_messages(fused_prompt, encoded_image),
+        max_tokens=1000,
+        temperature=0.3,
+        timeout=VISION_TIMEOUT,
+        response_format={"type": "json_object"}
+    )
+    result = json.loads(content)
+    extracted_text = str(result.get("text") or "").strip()
+    if not extracted_text:
+        raise ValueError("No text detected in the image")
+
+    print(f"[OCR] Extracted Text: {extracted_text}")
+
+    # Already in the target language, nothing to translate
+    if str(result.get("language") or "").strip().lower() == dest_lang.lower():
+        return extracted_text
+
+    translated_text = str(result.get("translation") or "").strip()
+    if not translated_text:
+        # The model skipped the translation, fall back to the text model
+        return translate_text(extracted_text, dest_lang)
+    translation_cache.put(extracted_text, dest_lang, translated_text, backend="groq")
+    return translated_text
+
+
+def _two_stage_extract_and_translate(encoded_image: str, dest_lang: str) -> str:
+    """Extract with the vision model, then translate with the text model"""
+    text_extraction_prompt = (
+        "Extract all visible text from the provided image."
+        "Give the exact response without any other codes"
+        "Return only the extracted text, without any additional commentary or description."
+        "Response should contain a string which a translated version of input "
+    )
+
+    extracted_text = get_client().chat(
+        VISION_MODEL,
+        _image_messages(text_extraction_prompt, encoded_image),
+        max_tokens=1000,
+        temperature=0.3,
+        timeout=VISION_TIMEOUT
+    )
+
+    if not extracted_text:
+        raise ValueError("No text detected in the image")
+
+    print(f"[OCR] Extracted Text: {extracted_text}")
+
+    # Translation phase
+    return translate_text(extracted_text, dest_lang)
+
+
+def translate_text_from_image_array(image: Frame, dest_lang: str = 'en',
+                                    mode: str = IMAGE_TRANSLATE_MODE) -> str:
+    """Extract text from an RGB image array (or JPEG bytes) using LLaMA Vision model and translate
+
+    mode is "fused" (one vision call) or "two_stage" (vision call then text call).
+    """
     try:
-        # Convert NumPy array (RGB) to PIL Image
-        pil_img = Image.fromarray(image_array)
-
-        # Save to BytesIO buffer
-        buffered = io.BytesIO()
-        pil_img.save(buffered, format="JPEG")
-
-        # Encode image to base64
-        encoded_image = base64.b64encode(buffered.getvalue()).decode("utf-8")
-
-        # Now your API call — same as before, but using `encoded_image`
-        text_extraction_prompt = (
-            "Extract all visible text from the provided image."
-            "Give the exact response without any other codes"
-            "Return only the extracted text, without any additional commentary or description."
-            "Response should contain a string which a translated version of input "
-        )
-
-        messages = [{
-            "role": "user",
-            "content": [
-                {"type": "text", "text": text_extraction_prompt},
-                {"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{encoded_image}"}}
-            ]
-        }]
-
-        response = requests.post(
-            GROQ_API_URL,
-            json={
-                "model": "meta-llama/llama-4-scout-17b-16e-instruct",
-                "messages": messages,
-                "max_tokens": 1000,
-                "temperature": 0.3
-            },
-            headers={
-                "Authorization": f"Bearer {GROQ_API_KEY}",
-                "Content-Type": "application/json"
-            },
-            timeout=60
-        )
-        response.raise_for_status()
-
-        result = response.json()
-        extracted_text = result["choices"][0]["message"]["content"].strip()
-
-        if not extracted_text:
-            raise ValueError("No text detected in the image")
-
-        print(f"[OCR] Extracted Text: {extracted_text}")
-
-        # Translation phase — you can keep this as it was
-
-        translation_prompt = (
-            f"Translate the following text to {dest_lang}:\n\n"
-            "Give only the response of translated text no other words"
-            f"{extracted_text}"
-        )
-
-        messages = [{
-            "role": "user",
-            "content": translation_prompt
-        }]
-
-        response = requests.post(
-            GROQ_API_URL,
-            json={
-                "model": "llama-3.3-70b-versatile",
-                "messages": messages,
-                "max_tokens": 1000,
-                "temperature": 0.3
-            },
-            headers={
-                "Authorization": f"Bearer {GROQ_API_KEY}",
-                "Content-Type": "application/json"
-            },
-            timeout=30
-        )
-        response.raise_for_status()
-
-        result = response.json()
-        translated_text = result["choices"][0]["message"]["content"].strip()
+        if TEXT_GATE_ENABLED:
+            with span("text_gate"):
+                gate = detect_text(image)
+            if not gate.has_text:
+                # Nothing that looks like text, don't spend upstream calls on it
+                print(f"[TextGate] No text detected (edge density {gate.edge_density:.4f})")
+                return None
+            if not gate.uncertain and not isinstance(image, (bytes, bytearray)):
+                # Device JPEGs and borderline frames are forwarded whole; raw frames are trimmed to the text
+                image = crop_to_text(image, gate)
+
+        encoded_image = encode_image_base64(image)
+
+        if mode == "fused":
+            try:
+                translated_text = _fused_extract_and_translate(encoded_image, dest_lang)
+            except (json.JSONDecodeError, AttributeError) as e:
+                print(f"Fused response unusable ({str(e)}), falling back to two-stage")
+                translated_text = _two_stage_extract_and_translate(encoded_image, dest_lang)
+        else:
+            translated_text = _two_stage_extract_and_translate(encoded_image, dest_lang)
 
         print(translated_text)
         return translated_text
@@ -128,9 +143,11 @@ def translate_text_from_image_array(image_array: np.ndarray, dest_lang: str = 'e
         return None
 
 
-
-
 def translate_text(extracted_text: str, dest_lang: str = 'en') -> str:
+        cached = translation_cache.get(extracted_text, dest_lang, backend="groq")
+        if cached is not None:
+            print(f"[Translation] (cached) {cached}")
+            return cached
 
         # Prepare translation prompt
         translation_prompt = (
@@ -144,24 +161,13 @@ def translate_text(extracted_text: str, dest_lang: str = 'en') -> str:
         }]
 
         # Make API request for translation
-        response = requests.post(
-            GROQ_API_URL,
-            json={
-                "model": "llama-3.3-70b-versatile",
-                "messages": messages,
-                "max_tokens": 1000,
-                "temperature": 0.3
-            },
-            headers={
-                "Authorization": f"Bearer {GROQ_API_KEY}",
-                "Content-Type": "application/json"
-            },
-            timeout=30
+        translated_text = get_client().chat(
+            TEXT_MODEL,
+            messages,
+            max_tokens=1000,
+            temperature=0.3,
+            timeout=TEXT_TIMEOUT
         )
-        response.raise_for_status()
-
-        # Extract translated text
-        result = response.json()
-        translated_text = result["choices"][0]["message"]["content"].strip()
         print(f"[Translation] {translated_text}")
+        translation_cache.put(extracted_text, dest_lang, translated_text, backend="groq")
         return translated_text
\ No newline at end of file
@@ -0,0 +1,144 @@
+import asyncio
+import sqlite3
+import sys
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from config import TRANSLATION_CACHE_SIZE, TRANSLATION_CACHE_DB
+
+
+def normalize_text(text: str) -> str:
+    """Collapse runs of whitespace so formatting differences share a cache entry"""
+    return " ".join(text.split())
+
+
+class TranslationCache:
+    """In-memory LRU of translations with an optional SQLite tier that survives restarts"""
+
+    def __init__(self, max_entries: int = TRANSLATION_CACHE_SIZE, db_path: str = TRANSLATION_CACHE_DB):
+        self.max_entries = max_entries
+        # (backend, dest_lang, normalized text) -> translation
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # Separate from _lock so memory hits never wait behind disk I/O
+        self._db_lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.db_path = db_path
+        self._db = None
+
+    def _connect(self):
+        # Caller holds _db_lock. Opened on first lookup so importing never touches the disk.
+        if self._db is None and self.db_path:
+            self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS translations ("
+                "backend TEXT NOT NULL, dest_lang TEXT NOT NULL, source TEXT NOT NULL, "
+                "translation TEXT NOT NULL, PRIMARY KEY (backend, dest_lang, source))"
+            )
+            self._db.commit()
+        return self._db
+
+    @staticmethod
+    def _size(key: tuple, value: str) -> int:
+        return sum(sys.getsizeof(part) for part in key) + sys.getsizeof(value)
+
+    def _remember(self, key: tuple, value: str):
+        # Caller holds the lock
+        if key in self._entries:
+            self._bytes -= self._size(key, self._entries[key])
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        self._bytes += self._size(key, value)
+        while len(self._entries) > self.max_entries:
+            old_key, old_value = self._entries.popitem(last=False)
+            self._bytes -= self._size(old_key, old_value)
+
+    def open(self):
+        """Open the SQLite tier now instead of on the first lookup"""
+        with self._db_lock:
+            self._connect()
+
+    def _memory_get(self, key: tuple) -> Optional[str]:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            return None
+
+    def _disk_get(self, key: tuple) -> Optional[str]:
+        row = None
+        if self.db_path:
+            with self._db_lock:
+                row = self._connect().execute(
+                    "SELECT translation FROM translations WHERE backend = ? AND dest_lang = ? AND source = ?",
+                    key
+                ).fetchone()
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+            self._remember(key, row[0])
+            self.disk_hits += 1
+            return row[0]
+
+    def _disk_put(self, key: tuple, translation: str):
+        if not self.db_path:
+            return
+        with self._db_lock:
+            db = self._connect()
+            db.execute(
+                "INSERT OR REPLACE INTO translations (backend, dest_lang, source, translation) "
+                "VALUES (?, ?, ?, ?)",
+                (*key, translation)
+            )
+            db.commit()
+
+    def get(self, text: str, dest_lang: str, backend: str = "default") -> Optional[str]:
+        """Blocking lookup, for worker threads"""
+        key = (backend, dest_lang, normalize_text(text))
+        cached = self._memory_get(key)
+        return cached if cached is not None else self._disk_get(key)
+
+    def put(self, text: str, dest_lang: str, translation: str, backend: str = "default"):
+        """Blocking store, for worker threads"""
+        key = (backend, dest_lang, normalize_text(text))
+        with self._lock:
+            self._remember(key, translation)
+        self._disk_put(key, translation)
+
+    async def aget(self, text: str, dest_lang: str, backend: str = "default") -> Optional[str]:
+        """Lookup from the event loop; only the SQLite tier is read on a thread"""
+        key = (backend, dest_lang, normalize_text(text))
+        cached = self._memory_get(key)
+        if cached is not None:
+            return cached
+        if not self.db_path:
+            return self._disk_get(key)
+        return await asyncio.to_thread(self._disk_get, key)
+
+    async def aput(self, text: str, dest_lang: str, translation: str, backend: str = "default"):
+        """Store from the event loop; the SQLite write and commit run on a thread"""
+        key = (backend, dest_lang, normalize_text(text))
+        with self._lock:
+            self._remember(key, translation)
+        if self.db_path:
+            await asyncio.to_thread(self._disk_put, key, translation)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "memory_bytes": self._bytes,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_ratio": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+        }
+
+
+translation_cache = TranslationCache()
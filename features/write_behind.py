@@ -0,0 +1,107 @@
+import asyncio
+from typing import Optional
+
+from config import WRITE_BEHIND_MODE, WRITE_BEHIND_MAX_BATCH, WRITE_BEHIND_MAX_DELAY
+from features.metrics import span
+
+
+class WriteBehindBuffer:
+    """Collects ORM rows and inserts them in one transaction per size or time threshold.
+
+    In "group" mode submit() returns once the row's batch has committed, so the
+    reported id is real. In "async" mode it returns right away with id unset.
+    """
+
+    def __init__(self, session_factory, mode: str = WRITE_BEHIND_MODE,
+                 max_batch: int = WRITE_BEHIND_MAX_BATCH, max_delay: float = WRITE_BEHIND_MAX_DELAY):
+        self.session_factory = session_factory
+        self.mode = mode
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._pending = []
+        # Made in start(), on the loop that will wait on it, so a later lifespan can use a fresh loop
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self.rows_written = 0
+        self.batches = 0
+        self.failed_rows = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode in ("group", "async")
+
+    def start(self):
+        if self.enabled and self._task is None:
+            self._stopping = False
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Flush-on-shutdown: everything accepted so far is written before returning"""
+        if self._task is not None:
+            # Ask the loop to drain rather than cancelling it, which could cut a commit short
+            # and leave its batch lost with the waiting requests never answered
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        while self._pending:
+            await self.flush()
+
+    async def submit(self, row):
+        # Only group mode waits, so only group mode needs a future to wait on
+        future = asyncio.get_running_loop().create_future() if self.mode == "group" else None
+        self._pending.append((row, future))
+        if len(self._pending) >= self.max_batch and self._wakeup is not None:
+            self._wakeup.set()
+        if future is not None:
+            await future
+        return row
+
+    async def flush(self):
+        batch, self._pending = self._pending[:self.max_batch], self._pending[self.max_batch:]
+        if not batch:
+            return
+        try:
+            with span("db_group_commit"):
+                async with self.session_factory() as db:
+                    db.add_all([row for row, _ in batch])
+                    # One transaction, so one commit/fsync for the whole batch
+                    await db.commit()
+        except Exception as e:
+            self.failed_rows += len(batch)
+            print(f"Write-behind flush of {len(batch)} rows failed: {str(e)}")
+            for _, future in batch:
+                if future is not None and not future.done():
+                    future.set_exception(e)
+            return
+        self.rows_written += len(batch)
+        self.batches += 1
+        for _, future in batch:
+            if future is not None and not future.done():
+                future.set_result(None)
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.max_delay)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            while self._pending:
+                await self.flush()
+                if len(self._pending) < self.max_batch:
+                    break
+        while self._pending:
+            await self.flush()
+
+    def stats(self) -> dict:
+        return {
+            "mode": self.mode,
+            "pending": len(self._pending),
+            "rows_written": self.rows_written,
+            "batches": self.batches,
+            "avg_batch": self.rows_written / self.batches if self.batches else 0.0,
+            "failed_rows": self.failed_rows,
+        }
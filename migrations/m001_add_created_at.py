@@ -0,0 +1,69 @@
+"""Add the indexed created_at column to alerts, conversations and notes, filled from date + time.
+
+Safe to re-run: existing columns and indexes are left alone and only rows with a
+NULL created_at are backfilled.
+
+Run from the repository root:
+    python -m migrations.m001_add_created_at
+"""
+import asyncio
+from datetime import datetime
+
+from sqlalchemy import inspect, text
+
+from edith import init_engine, dispose_engine, Alert, Conversation, Note
+
+BATCH_SIZE = 1000
+
+
+def parse_timestamp(date: str, time: str):
+    try:
+        return datetime.strptime(f"{date} {time}", "%Y-%m-%d %H:%M:%S")
+    except (TypeError, ValueError):
+        return None
+
+
+def add_column(conn, model):
+    table = model.__table__
+    if "created_at" not in {column["name"] for column in inspect(conn).get_columns(table.name)}:
+        conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN created_at DATETIME NULL"))
+        print(f"{table.name}: added created_at")
+
+    for index in table.indexes:
+        if "created_at" in index.columns:
+            index.create(bind=conn, checkfirst=True)
+
+
+async def migrate(model):
+    table = model.__table__
+    engine = init_engine()
+    async with engine.begin() as conn:
+        await conn.run_sync(add_column, model)
+
+    filled, last_id = 0, 0
+    while True:
+        async with engine.begin() as conn:
+            rows = (await conn.execute(
+                text(f"SELECT id, date, time FROM {table.name} "
+                     "WHERE created_at IS NULL AND id > :last_id ORDER BY id LIMIT :limit"),
+                {"last_id": last_id, "limit": BATCH_SIZE}
+            )).fetchall()
+            if not rows:
+                break
+            last_id = rows[-1].id
+            updates = [{"id": row.id, "created_at": parse_timestamp(row.date, row.time)} for row in rows]
+            updates = [update for update in updates if update["created_at"] is not None]
+            if updates:
+                await conn.execute(text(f"UPDATE {table.name} SET created_at = :created_at WHERE id = :id"), updates)
+            filled += len(updates)
+    print(f"{table.name}: backfilled {filled} rows")
+
+
+async def main():
+    for model in (Alert, Conversation, Note):
+        await migrate(model)
+    await dispose_engine()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,43 @@
+"""Widen conversations.conversation and conversations.summary from VARCHAR(255) to TEXT.
+
+Rows written before this ran may already hold truncated transcripts; those are not
+recoverable. SQLite does not enforce VARCHAR lengths, so there is nothing to do there.
+
+Run from the repository root:
+    python -m migrations.m002_conversation_text_columns
+"""
+import asyncio
+
+from sqlalchemy import inspect, text
+
+from edith import init_engine, dispose_engine, Conversation
+
+COLUMNS = ("conversation", "summary")
+
+
+def widen_columns(conn):
+    table = Conversation.__table__.name
+    if conn.dialect.name == "sqlite":
+        print(f"{table}: sqlite does not enforce column lengths, skipping")
+        return
+    types = {column["name"]: column["type"] for column in inspect(conn).get_columns(table)}
+    pending = [name for name in COLUMNS if getattr(types.get(name), "length", None) is not None]
+    if not pending:
+        print(f"{table}: columns are already TEXT")
+        return
+    if conn.dialect.name == "mysql":
+        changes = ", ".join(f"MODIFY {name} TEXT" for name in pending)
+    else:
+        changes = ", ".join(f"ALTER COLUMN {name} TYPE TEXT" for name in pending)
+    conn.execute(text(f"ALTER TABLE {table} {changes}"))
+    print(f"{table}: widened {', '.join(pending)} to TEXT")
+
+
+async def main():
+    async with init_engine().begin() as conn:
+        await conn.run_sync(widen_columns)
+    await dispose_engine()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,38 @@
+"""Build the full-text search index used by GET /search.
+
+MySQL: adds FULLTEXT indexes on notes(note) and conversations(conversation, summary).
+SQLite: creates the FTS5 table and its triggers and indexes existing rows.
+Safe to re-run; indexes that already exist are left alone.
+
+Run from the repository root:
+    python -m migrations.m003_search_index
+"""
+import asyncio
+
+from sqlalchemy import inspect
+
+from edith import init_engine, dispose_engine, Conversation, Note
+from features.search_index import create_search_index
+
+
+def add_fulltext_indexes(conn):
+    if conn.dialect.name != "mysql":
+        create_search_index(conn)
+        return
+    for model in (Note, Conversation):
+        table = model.__table__
+        existing = {index["name"] for index in inspect(conn).get_indexes(table.name)}
+        for index in table.indexes:
+            if index.dialect_options["mysql"]["prefix"] == "FULLTEXT" and index.name not in existing:
+                index.create(bind=conn)
+                print(f"{table.name}: added {index.name}")
+
+
+async def main():
+    async with init_engine().begin() as conn:
+        await conn.run_sync(add_fulltext_indexes)
+    await dispose_engine()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,94 @@
+"""Import-time and startup-time budget check for app.py and edith.py.
+
+Each measurement runs in a fresh interpreter with no credentials, no hardware and
+warm-up disabled, importing the module and then entering its lifespan. Fails (exit
+status 1) when the median is over budget or when an import pulls in a heavy or
+device-bound module that should only load lazily.
+
+Run from the repository root:
+    python -m tools.check_startup
+    python -m tools.check_startup --import-budget-ms 800 --repeats 7
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+# Must never be imported as a side effect of importing the apps
+LAZY_MODULES = ["tensorflow", "mediapipe", "pyaudio", "vosk", "faster_whisper", "google.generativeai",
+                "googletrans", "pytesseract", "PIL", "aiomysql", "aiosqlite"]
+
+PROBE = """
+import asyncio, importlib, json, sys, time
+start = time.perf_counter()
+module = importlib.import_module(sys.argv[1])
+imported = time.perf_counter()
+loaded = [name for name in json.loads(sys.argv[2]) if name in sys.modules]
+
+async def main():
+    async with module.app.router.lifespan_context(module.app):
+        return time.perf_counter()
+
+ready = asyncio.run(main())
+print(json.dumps({"import_ms": (imported - start) * 1000, "startup_ms": (ready - imported) * 1000,
+                  "lazy_loaded": loaded}))
+"""
+
+
+def probe(module: str, env: dict) -> dict:
+    output = subprocess.run([sys.executable, "-c", PROBE, module, json.dumps(LAZY_MODULES)],
+                            env=env, capture_output=True, text=True, timeout=120)
+    if output.returncode != 0:
+        raise RuntimeError(f"{module} failed to start:\n{output.stderr}")
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--modules", nargs="+", default=["app", "edith"])
+    parser.add_argument("--import-budget-ms", type=float, default=1500)
+    parser.add_argument("--startup-budget-ms", type=float, default=500)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as scratch:
+        env = {key: value for key, value in os.environ.items()
+               if not key.startswith(("GROQ_", "GEMINI_"))}
+        env.update(
+            PYTHONPATH=os.getcwd(),
+            STARTUP_WARMUP="0",
+            ARCHIVE_EVERY_N="0",
+            # No microphone here: replay nothing and let the listener exit
+            AUDIO_SOURCE="wav",
+            AUDIO_WAV_PATH=os.path.join(scratch, "missing.wav"),
+            TRANSLATION_CACHE_DB=os.path.join(scratch, "translations.db"),
+            EDITH_DATABASE_URL=f"sqlite+aiosqlite:///{os.path.join(scratch, 'edith.db')}",
+        )
+
+        failed = False
+        for module in args.modules:
+            runs = [probe(module, env) for _ in range(args.repeats)]
+            import_ms = statistics.median(run["import_ms"] for run in runs)
+            startup_ms = statistics.median(run["startup_ms"] for run in runs)
+            lazy_loaded = sorted({name for run in runs for name in run["lazy_loaded"]})
+
+            problems = []
+            if import_ms > args.import_budget_ms:
+                problems.append(f"import {import_ms:.0f} ms > {args.import_budget_ms:.0f} ms")
+            if startup_ms > args.startup_budget_ms:
+                problems.append(f"startup {startup_ms:.0f} ms > {args.startup_budget_ms:.0f} ms")
+            if lazy_loaded:
+                problems.append(f"imported eagerly: {', '.join(lazy_loaded)}")
+            failed = failed or bool(problems)
+
+            print(f"{module:8} import {import_ms:7.0f} ms  startup {startup_ms:7.0f} ms  "
+                  f"{'FAIL: ' + '; '.join(problems) if problems else 'ok'}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
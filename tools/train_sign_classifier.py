@@ -0,0 +1,76 @@
+"""Train the local sign classifier from a folder of labelled hand images.
+
+Layout: <dataset>/<label>/*.jpg, one folder per ASL letter or sign. Writes the
+TFLite model and labels file that features/sign_classifier.py loads.
+
+Run from the repository root:
+    python -m tools.train_sign_classifier path/to/dataset
+"""
+import argparse
+import glob
+import os
+
+import cv2
+import numpy as np
+
+from config import SIGN_MODEL_PATH, SIGN_LABELS_PATH
+from features.sign_classifier import landmark_features
+
+
+def extract(dataset: str):
+    import mediapipe as mp
+
+    labels = sorted(d for d in os.listdir(dataset) if os.path.isdir(os.path.join(dataset, d)))
+    features, targets, skipped = [], [], 0
+    with mp.solutions.hands.Hands(static_image_mode=True, max_num_hands=1) as hands:
+        for index, label in enumerate(labels):
+            for path in glob.glob(os.path.join(dataset, label, "*")):
+                image = cv2.imread(path)
+                if image is None:
+                    continue
+                result = hands.process(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
+                if not result.multi_hand_landmarks:
+                    skipped += 1
+                    continue
+                features.append(landmark_features(result.multi_hand_landmarks[0].landmark))
+                targets.append(index)
+    print(f"{len(features)} samples over {len(labels)} labels, {skipped} images without a hand")
+    return labels, np.array(features, dtype=np.float32), np.array(targets)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("dataset")
+    parser.add_argument("--epochs", type=int, default=60)
+    parser.add_argument("--model", default=SIGN_MODEL_PATH)
+    parser.add_argument("--labels", default=SIGN_LABELS_PATH)
+    args = parser.parse_args()
+
+    import tensorflow as tf
+
+    labels, x, y = extract(args.dataset)
+    order = np.random.default_rng(0).permutation(len(x))
+    x, y = x[order], y[order]
+
+    model = tf.keras.Sequential([
+        tf.keras.layers.Input(shape=(x.shape[1],)),
+        tf.keras.layers.Dense(128, activation="relu"),
+        tf.keras.layers.Dropout(0.2),
+        tf.keras.layers.Dense(64, activation="relu"),
+        tf.keras.layers.Dense(len(labels), activation="softmax"),
+    ])
+    model.compile(optimizer="adam", loss="sparse_categorical_crossentropy", metrics=["accuracy"])
+    model.fit(x, y, epochs=args.epochs, validation_split=0.2, verbose=2)
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    os.makedirs(os.path.dirname(args.model) or ".", exist_ok=True)
+    with open(args.model, "wb") as f:
+        f.write(converter.convert())
+    with open(args.labels, "w") as f:
+        f.write("\n".join(labels) + "\n")
+    print(f"Wrote {args.model} and {args.labels}")
+
+
+if __name__ == "__main__":
+    main()